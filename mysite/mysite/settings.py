@@ -81,6 +81,26 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# Rendered pages are kept per process in an LRU bounded local memory cache;
+# the version counters used in their keys (see results/cache.py) are shared
+# with `manage.py fetch` through the file system.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "results-pages",
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
+    "versions": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache"),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,290 @@
+"""
+Lineup analytics over a contest's standings.
+
+LineupCollector turns each entry's Lineup string (e.g. "C Joel Embiid F LeBron
+James G ...") into player ids while the standings are parsed and keeps them in
+flat integer arrays. get_stats() then works on all entries at once with NumPy:
+
+    ownership    share of entries (and of the top entries) rostering a player
+    leverage     top ownership minus ownership
+    duplication  how many entries share the same set of players
+    stacks       how many entries roster n players from the same team
+"""
+
+import logging
+import re
+import time
+from array import array
+from collections import namedtuple
+
+import numpy as np
+from django.db import transaction
+
+from results.lineups import ContestLineups
+from results.models import (
+    DKContestLineupStat,
+    DKContestPlayerStat,
+    DKContestStack,
+    Player,
+)
+from results.utils import ROSTER_SIZES
+
+logger = logging.getLogger(__name__)
+
+# roster slot names that separate players in a Lineup string
+SLOT_WORDS = {
+    "NBA": ["PG", "SG", "SF", "PF", "C", "G", "F", "UTIL"],
+    "NFL": ["QB", "RB", "WR", "TE", "FLEX", "DST"],
+    "MLB": ["P", "C", "1B", "2B", "3B", "SS", "OF"],
+    "NHL": ["C", "W", "D", "G", "UTIL"],
+    "PGA": ["G"],
+    "MMA": ["F"],
+    "NAS": ["D"],
+}
+# fraction of the standings (by rank) counted as top entries
+TOP_FRACTION = 0.01
+# smallest number of players from one team that counts as a stack
+MIN_STACK_SIZE = 2
+# player id for empty or unknown roster slots
+UNKNOWN = -1
+
+LineupStats = namedtuple(
+    "LineupStats",
+    [
+        "entries",
+        "top_entries",
+        "unique_lineups",
+        "duplicated_entries",
+        "max_duplicates",
+        "unknown_players",
+        # [(player id, ownership, top ownership, leverage)]
+        "players",
+        # [(team, size, entries, frequency, top frequency)]
+        "stacks",
+    ],
+)
+
+
+def get_slot_pattern(sport):
+    words = sorted(SLOT_WORDS.get(sport, SLOT_WORDS["NBA"]), key=len, reverse=True)
+    return re.compile(r"(?:^|\s)(?:%s)\s" % "|".join(map(re.escape, words)))
+
+
+class LineupCollector:
+    """Accumulate the entries of a contest and their lineups."""
+
+    def __init__(self, sport, player_index):
+        self.player_index = player_index
+        self.slots = get_slot_pattern(sport)
+        self.roster_size = ROSTER_SIZES.get(sport, max(ROSTER_SIZES.values()))
+        self.entry_ids = array("q")
+        self.entry_names = []
+        self.ranks = array("i")
+        self.points = array("d")
+        # roster_size player ids per entry
+        self.player_ids = array("i")
+        # player id => team, for every player seen
+        self.teams = {}
+        # caches, since most names (and many lineups) repeat across entries
+        self.names = {}
+        self.lineups = {}
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def get_player_id(self, name):
+        try:
+            return self.names[name]
+        except KeyError:
+            pass
+
+        try:
+            player = self.player_index.get(name)
+            self.teams[player.pk] = player.team_abbv
+            player_id = player.pk
+        except (Player.DoesNotExist, Player.MultipleObjectsReturned) as ex:
+            logger.debug("Couldn't find lineup player %s: %s", name, ex)
+            player_id = UNKNOWN
+        self.names[name] = player_id
+        return player_id
+
+    def parse_lineup(self, lineup):
+        names = [name.strip() for name in self.slots.split(lineup)]
+        ids = [self.get_player_id(name) for name in names if name]
+        ids = ids[: self.roster_size]
+        return ids + [UNKNOWN] * (self.roster_size - len(ids))
+
+    def add(self, entry_id, entry_name, rank, points, lineup):
+        ids = self.lineups.get(lineup)
+        if ids is None:
+            ids = self.lineups[lineup] = self.parse_lineup(lineup)
+        self.entry_ids.append(entry_id)
+        self.entry_names.append(entry_name)
+        self.ranks.append(rank)
+        self.points.append(points)
+        self.player_ids.extend(ids)
+
+    def get_lineups(self):
+        """Return the collected entries as ContestLineups, or None if empty."""
+        if not self.ranks:
+            return None
+
+        return ContestLineups(
+            entry_ids=np.frombuffer(self.entry_ids, dtype=np.int64),
+            names=self.entry_names,
+            ranks=np.frombuffer(self.ranks, dtype=np.intc),
+            points=np.frombuffer(self.points, dtype=np.float64),
+            lineups=np.frombuffer(self.player_ids, dtype=np.intc).reshape(
+                len(self.ranks), self.roster_size
+            ),
+        )
+
+    def get_stats(self):
+        """Return the LineupStats of the collected entries, or None if empty."""
+        contest_lineups = self.get_lineups()
+        if contest_lineups is None:
+            return None
+
+        start = time.perf_counter()
+        stats = get_lineup_stats(
+            contest_lineups.ranks, contest_lineups.lineups, self.teams
+        )
+        logger.info(
+            "Lineup stats for %d entries computed in %.2fs",
+            stats.entries,
+            time.perf_counter() - start,
+        )
+        return stats
+
+
+def get_top_entries(ranks):
+    """Return a mask of the entries ranked in the top TOP_FRACTION."""
+    cutoff = max(1, int(len(ranks) * TOP_FRACTION))
+    return ranks <= np.partition(ranks, cutoff - 1)[cutoff - 1]
+
+
+def get_lineup_stats(ranks, lineups, teams):
+    """
+    Compute LineupStats for the entries with @ranks and the (entries x roster
+    size) player id matrix @lineups; @teams maps player ids to teams.
+    """
+    entries = len(ranks)
+    top = get_top_entries(ranks)
+    top_entries = int(top.sum())
+
+    # dense player codes, so that counts are a bincount away
+    player_ids, codes = np.unique(lineups, return_inverse=True)
+    codes = codes.reshape(lineups.shape)
+    field_counts = np.bincount(codes.ravel(), minlength=len(player_ids))
+    top_counts = np.bincount(codes[top].ravel(), minlength=len(player_ids))
+    ownership = field_counts / entries
+    top_ownership = top_counts / top_entries
+    players = [
+        (int(player_id), own, top_own, top_own - own)
+        for player_id, own, top_own in zip(
+            player_ids.tolist(), ownership.tolist(), top_ownership.tolist()
+        )
+        if player_id != UNKNOWN
+    ]
+
+    # the same players in a different slot order are the same lineup
+    _, lineup_codes, lineup_counts = np.unique(
+        np.sort(lineups, axis=1), axis=0, return_inverse=True, return_counts=True
+    )
+    duplicates = lineup_counts[lineup_codes.ravel()]
+
+    team_names = sorted({team for team in teams.values() if team})
+    team_index = {team: i for i, team in enumerate(team_names)}
+    code_teams = np.array(
+        [team_index.get(teams.get(player_id), -1) for player_id in player_ids.tolist()],
+        dtype=np.int64,
+    )
+    stacks = get_stacks(code_teams[codes], top, team_names)
+
+    return LineupStats(
+        entries=entries,
+        top_entries=top_entries,
+        unique_lineups=len(lineup_counts),
+        duplicated_entries=int((duplicates > 1).sum()),
+        max_duplicates=int(lineup_counts.max()),
+        unknown_players=int((lineups == UNKNOWN).sum()),
+        players=players,
+        stacks=stacks,
+    )
+
+
+def get_stacks(entry_teams, top, team_names):
+    """
+    Return (team, size, entries, frequency, top frequency) for each team and
+    number (at least MIN_STACK_SIZE) of its players rostered together, given
+    the (entries x roster size) team codes @entry_teams (-1 for no team).
+    """
+    if not team_names:
+        return []
+
+    entries, roster_size = entry_teams.shape
+    top_entries = int(top.sum())
+    num_teams = len(team_names)
+    has_team = entry_teams >= 0
+    rows = np.broadcast_to(np.arange(entries)[:, None], entry_teams.shape)[has_team]
+    # players from each team in each entry, as entry * num_teams + team codes
+    pairs, sizes = np.unique(
+        rows * num_teams + entry_teams[has_team], return_counts=True
+    )
+    stacked = sizes >= MIN_STACK_SIZE
+    # one key per (team, size) combination
+    keys = (pairs[stacked] % num_teams) * (roster_size + 1) + sizes[stacked]
+    in_top = top[pairs[stacked] // num_teams]
+
+    top_keys, top_counts = np.unique(keys[in_top], return_counts=True)
+    top_counts = dict(zip(top_keys.tolist(), top_counts.tolist()))
+    keys, counts = np.unique(keys, return_counts=True)
+    return [
+        (
+            team_names[key // (roster_size + 1)],
+            key % (roster_size + 1),
+            count,
+            count / entries,
+            top_counts.get(key, 0) / top_entries,
+        )
+        for key, count in zip(keys.tolist(), counts.tolist())
+    ]
+
+
+def save_lineup_stats(contest, stats):
+    """Replace the stored analytics of @contest with @stats."""
+    with transaction.atomic():
+        DKContestLineupStat.objects.update_or_create(
+            contest=contest,
+            defaults={
+                "entries": stats.entries,
+                "top_entries": stats.top_entries,
+                "unique_lineups": stats.unique_lineups,
+                "duplicated_entries": stats.duplicated_entries,
+                "max_duplicates": stats.max_duplicates,
+                "unknown_players": stats.unknown_players,
+            },
+        )
+        DKContestPlayerStat.objects.filter(contest=contest).delete()
+        DKContestPlayerStat.objects.bulk_create(
+            DKContestPlayerStat(
+                contest=contest,
+                player_id=player_id,
+                ownership=ownership,
+                top_ownership=top_ownership,
+                leverage=leverage,
+            )
+            for player_id, ownership, top_ownership, leverage in stats.players
+        )
+        DKContestStack.objects.filter(contest=contest).delete()
+        DKContestStack.objects.bulk_create(
+            DKContestStack(
+                contest=contest,
+                team_abbv=team,
+                size=size,
+                entries=entries,
+                frequency=frequency,
+                top_frequency=top_frequency,
+            )
+            for team, size, entries, frequency, top_frequency in stats.stacks
+        )
@@ -0,0 +1,209 @@
+"""
+JSON API for contests, results and ownership.
+
+List endpoints are paginated with keyset cursors: each response carries a
+"next" cursor that encodes the sort value and id of its last row, and the
+next page is requested with ?after=<cursor>. Other query parameters:
+
+    limit   page size (default DEFAULT_LIMIT, at most MAX_LIMIT)
+    fields  comma separated subset of the endpoint's fields
+    format  "ndjson" streams every row as newline delimited JSON instead
+
+The ROI endpoint is computed from the stored lineups and only takes limit.
+"""
+import base64
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+
+from .lineups import load_contest_lineups
+from .models import DKContest
+from .payouts import PayoutTable, get_user_roi
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+# rows fetched per database round-trip when streaming
+STREAM_CHUNK_SIZE = 2000
+
+# public field name => model field or expression
+CONTEST_FIELDS = {
+    "id": "id",
+    "dk_id": "dk_id",
+    "date": "date",
+    "datetime": "datetime",
+    "sport": "sport",
+    "name": "name",
+    "total_prizes": "total_prizes",
+    "entries": "entries",
+    "entry_fee": "entry_fee",
+    "positions_paid": "positions_paid",
+    "draft_group_id": "draft_group_id",
+}
+RESULT_FIELDS = {
+    "id": "id",
+    "dk_id": "dk_id",
+    "name": "name",
+    "rank": "rank",
+    "points": "points",
+}
+OWNERSHIP_FIELDS = {
+    "id": "id",
+    "player_id": "player_id",
+    "player_name": F("player__name"),
+    "player_position": F("player__position"),
+    "ownership": "ownership",
+    "fpts": "fpts",
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def encode_cursor(value, pk):
+    data = json.dumps([value, pk], cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise BadRequest(f"Invalid cursor {cursor}")
+    return value, pk
+
+
+def order_by_key(queryset, field, descending):
+    """Order by (@field, id), with NULLs sorting as the smallest value."""
+    if descending:
+        return queryset.order_by(F(field).desc(nulls_last=True), "-id")
+    return queryset.order_by(F(field).asc(nulls_first=True), "id")
+
+
+def filter_after(queryset, field, descending, value, pk):
+    """Filter @queryset to the rows after (@value, @pk) in order_by_key order."""
+    lookup = "lt" if descending else "gt"
+    if value is None:
+        after = Q(**{f"{field}__isnull": True, f"id__{lookup}": pk})
+        if not descending:
+            after |= Q(**{f"{field}__isnull": False})
+    else:
+        after = Q(**{field: value, f"id__{lookup}": pk})
+        after |= Q(**{f"{field}__{lookup}": value})
+        if descending:
+            after |= Q(**{f"{field}__isnull": True})
+    return queryset.filter(after)
+
+
+def get_fields(request, available):
+    fields = request.GET.get("fields")
+    if not fields:
+        return list(available)
+
+    fields = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def select(queryset, available, fields, extra=()):
+    """Return queryset.values() for @fields plus the @extra fields."""
+    names = list(dict.fromkeys(list(fields) + list(extra)))
+    plain = [n for n in names if available[n] == n]
+    expressions = {n: available[n] for n in names if n not in plain}
+    return queryset.values(*plain, **expressions)
+
+
+def stream_rows(rows, fields):
+    for row in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        yield json.dumps({f: row[f] for f in fields}, cls=DjangoJSONEncoder) + "\n"
+
+
+def list_response(request, queryset, available, sort_field, descending):
+    """Return a page (or an NDJSON stream) of @queryset ordered by @sort_field."""
+    try:
+        fields = get_fields(request, available)
+        queryset = order_by_key(queryset, available[sort_field], descending)
+
+        if request.GET.get("format") == "ndjson":
+            rows = select(queryset, available, fields)
+            return StreamingHttpResponse(
+                stream_rows(rows, fields), content_type="application/x-ndjson"
+            )
+
+        limit = get_limit(request)
+        if "after" in request.GET:
+            value, pk = decode_cursor(request.GET["after"])
+            queryset = filter_after(
+                queryset, available[sort_field], descending, value, pk
+            )
+    except BadRequest as ex:
+        return JsonResponse({"error": str(ex)}, status=400)
+
+    rows = list(select(queryset, available, fields, ("id", sort_field))[: limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][sort_field], rows[-1]["id"])
+
+    return JsonResponse(
+        {"data": [{f: row[f] for f in fields} for row in rows], "next": next_cursor},
+        encoder=DjangoJSONEncoder,
+    )
+
+
+def contests(request):
+    queryset = DKContest.objects.all()
+    if "sport" in request.GET:
+        queryset = queryset.filter(sport__exact=request.GET["sport"])
+    return list_response(request, queryset, CONTEST_FIELDS, "date", descending=True)
+
+
+def contest_results(request, contest_id):
+    contest = get_object_or_404(DKContest, pk=contest_id)
+    return list_response(
+        request, contest.results.all(), RESULT_FIELDS, "rank", descending=False
+    )
+
+
+def contest_ownership(request, contest_id):
+    contest = get_object_or_404(DKContest, pk=contest_id)
+    return list_response(
+        request,
+        contest.ownership.all(),
+        OWNERSHIP_FIELDS,
+        "ownership",
+        descending=True,
+    )
+
+
+def contest_roi(request, contest_id):
+    """Winnings and ROI of each user in a contest, most winnings first."""
+    contest = get_object_or_404(DKContest, pk=contest_id)
+    try:
+        limit = get_limit(request)
+    except BadRequest as ex:
+        return JsonResponse({"error": str(ex)}, status=400)
+    contest_lineups = load_contest_lineups(contest)
+    if contest_lineups is None:
+        return JsonResponse({"error": "No standings stored for contest"}, status=404)
+
+    rows = get_user_roi(
+        contest_lineups, PayoutTable.for_contest(contest), contest.entry_fee
+    )
+    return JsonResponse({"data": [row._asdict() for row in rows[:limit]]})
@@ -0,0 +1,100 @@
+"""
+Response cache for the results pages.
+
+Rendered pages live in the "default" cache (local memory, LRU bounded) under
+keys that embed version numbers for the data they were built from. Versions
+live in the file-based "versions" cache, which is shared between the web
+process and `manage.py fetch`; the parsers bump them whenever they write, so
+outdated pages are never read again and simply age out of the LRU or expire.
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# seconds to keep a rendered page, so that a page is rebuilt eventually even
+# if the version it was stored under is somehow never bumped
+PAGE_TIMEOUT = 60 * 60
+
+STATS = Counter()
+STATS_LOCK = threading.Lock()
+
+
+def get_version(name):
+    versions = caches["versions"]
+    version = versions.get(name)
+    if version is None:
+        # start from a unique value so that a counter evicted from the cache
+        # can never be recreated with a version an old page was stored under
+        versions.add(name, time.time_ns(), timeout=None)
+        version = versions.get(name)
+    return version
+
+
+def bump_version(name):
+    # a single write of a new unique value rather than incr(), which reads and
+    # writes the file separately, so that bumps from concurrent processes
+    # can't undo each other
+    caches["versions"].set(name, time.time_ns(), timeout=None)
+
+
+def bump_index():
+    bump_version("index")
+
+
+def bump_contest(contest_id):
+    """Invalidate pages for a DKContest (by primary key) and the index."""
+    bump_version(f"contest:{contest_id}")
+    bump_index()
+
+
+def bump_draft_group(draft_group_id):
+    """Invalidate pages showing salaries from a draft group."""
+    bump_version(f"draft_group:{draft_group_id}")
+
+
+def record(event):
+    with STATS_LOCK:
+        STATS[event] += 1
+
+
+def get_stats():
+    with STATS_LOCK:
+        return {"hits": STATS["hits"], "misses": STATS["misses"]}
+
+
+def cached_page(get_key):
+    """
+    Cache a view's successful responses under get_key(request, *args, **kwargs).
+    Responses aren't cached when the key is None.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = get_key(request, *args, **kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+
+            pages = caches["default"]
+            content = pages.get(key)
+            if content is not None:
+                record("hits")
+                return HttpResponse(content)
+
+            record("misses")
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                pages.set(key, response.content, PAGE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
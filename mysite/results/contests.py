@@ -0,0 +1,89 @@
+"""
+Bulk writes of DKContest rows.
+
+Contest discovery and the contest page scrapers each produce DKContest
+fields for a batch of contests. write_contests() upserts them keyed on dk_id
+in one transaction with a query to read the existing rows, one bulk insert
+and one bulk update, and leaves rows whose fields didn't change alone.
+"""
+import logging
+from collections import namedtuple
+
+from django.db import models, transaction
+
+from results import cache
+from results.models import DKContest
+
+logger = logging.getLogger(__name__)
+
+ContestWrites = namedtuple("ContestWrites", ["created", "updated", "unchanged"])
+
+
+def get_changed_fields(contest, fields):
+    """Set @fields on @contest and return the names of those that changed."""
+    changed = []
+    for name, value in fields.items():
+        # compare as the database returns it, e.g. Decimal prizes
+        field = DKContest._meta.get_field(name)
+        value = field.to_python(value)
+        if isinstance(field, models.DecimalField) and value is not None:
+            value = round(value, field.decimal_places)
+        if getattr(contest, name) != value:
+            setattr(contest, name, value)
+            changed.append(name)
+    return changed
+
+
+def write_contests(contest_fields):
+    """
+    Create or update DKContests in bulk, skipping those that didn't change.
+    @param contest_fields [dict]: dk_id => dict of DKContest fields
+    @return: dk_id => DKContest, and ContestWrites counts
+    """
+    contest_fields = {str(dk_id): fields for dk_id, fields in contest_fields.items()}
+    with transaction.atomic():
+        contests = {
+            contest.dk_id: contest
+            for contest in DKContest.objects.filter(dk_id__in=contest_fields)
+        }
+        new_contests = []
+        changed = []
+        changed_fields = set()
+        for dk_id, fields in contest_fields.items():
+            contest = contests.get(dk_id)
+            if contest is None:
+                new_contests.append(DKContest(dk_id=dk_id))
+                get_changed_fields(new_contests[-1], fields)
+                continue
+
+            names = get_changed_fields(contest, fields)
+            if names:
+                changed.append(contest)
+                changed_fields.update(names)
+
+        DKContest.objects.bulk_create(new_contests)
+        if changed:
+            DKContest.objects.bulk_update(changed, sorted(changed_fields))
+        if new_contests:
+            # bulk_create doesn't set primary keys on SQLite
+            contests.update(
+                (contest.dk_id, contest)
+                for contest in DKContest.objects.filter(
+                    dk_id__in=[contest.dk_id for contest in new_contests]
+                )
+            )
+
+    for contest in changed:
+        cache.bump_contest(contest.pk)
+    if new_contests:
+        cache.bump_index()
+
+    unchanged = len(contest_fields) - len(new_contests) - len(changed)
+    counts = ContestWrites(len(new_contests), len(changed), unchanged)
+    logger.info(
+        "Contests: %d created, %d updated, %d unchanged",
+        counts.created,
+        counts.updated,
+        counts.unchanged,
+    )
+    return contests, counts
@@ -0,0 +1,128 @@
+"""
+Long-running mode of `manage.py fetch`.
+
+FetchDaemon polls the lobby, salaries and contest results of several sports
+on a sched scheduler in one process, so the HTTP session, cookies, lobby
+snapshots and player name indexes stay warm between cycles instead of being
+rebuilt by every cron run. Contests whose gamecenter page says they're still
+in progress are polled again after a growing delay rather than every cycle.
+"""
+import logging
+import sched
+import time
+
+from django.db import close_old_connections
+
+import results.parsers.dkcontests as dkcontests_parser
+import results.parsers.dkresults as dkresults_parser
+import results.parsers.dksalaries as dksalaries_parser
+from results.parsers import client
+from results.parsers.lobby import LOBBY_TTL, LobbySnapshot
+from results.utils import get_incomplete_contest_ids
+
+logger = logging.getLogger(__name__)
+
+# kind of poll => default seconds between polls, in the order they first run
+INTERVALS = {"contests": 15 * 60, "salaries": 60 * 60, "results": 30 * 60}
+# seconds before polling an in-progress contest again, doubled every time it's
+# still in progress up to MAX_BACKOFF
+MIN_BACKOFF = 30 * 60
+MAX_BACKOFF = 6 * 60 * 60
+
+
+def get_backoff(attempts):
+    """Return the delay before the next poll of a contest after @attempts."""
+    return min(MIN_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+
+
+class FetchDaemon:
+    def __init__(
+        self, sports, intervals=None, workers=1, salary_workers=1, lobby_ttl=LOBBY_TTL
+    ):
+        self.sports = sports
+        self.intervals = dict(INTERVALS, **(intervals or {}))
+        self.workers = workers
+        self.salary_workers = salary_workers
+        self.lobby_ttl = lobby_ttl
+        self.scheduler = sched.scheduler(time.monotonic, time.sleep)
+        # sport => LobbySnapshot shared by the contests and salaries polls
+        self.lobbies = {}
+        # contest id => (polls that found it in progress, time of next poll)
+        self.backoff = {}
+
+    def get_lobby(self, sport):
+        """Return the sport's lobby, fetching it if it's older than the TTL."""
+        lobby = self.lobbies.get(sport)
+        if lobby is None or time.time() - lobby.fetched_at > self.lobby_ttl:
+            lobby = self.lobbies[sport] = LobbySnapshot.fetch(sport, self.lobby_ttl)
+        return lobby
+
+    def poll_contests(self, sport):
+        dkcontests_parser.find_new_contests(sport, lobby=self.get_lobby(sport))
+
+    def poll_salaries(self, sport):
+        dksalaries_parser.run(
+            sport, workers=self.salary_workers, lobby=self.get_lobby(sport)
+        )
+
+    def poll_results(self, sport):
+        now = time.monotonic()
+        contest_ids = [
+            contest_id
+            for contest_id in get_incomplete_contest_ids(sport)
+            if self.backoff.get(contest_id, (0, now))[1] <= now
+        ]
+        if not contest_ids:
+            logger.info("No %s contests to update", sport)
+            return
+
+        completed = dkresults_parser.run(
+            sport=sport,
+            contest_ids=contest_ids,
+            contest=True,
+            resultscsv=True,
+            resultsparse=True,
+            workers=self.workers,
+        )
+        now = time.monotonic()
+        for contest_id in contest_ids:
+            if contest_id in completed:
+                self.backoff.pop(contest_id, None)
+                continue
+
+            attempts = self.backoff.get(contest_id, (0, now))[0] + 1
+            delay = get_backoff(attempts)
+            self.backoff[contest_id] = (attempts, now + delay)
+            logger.info(
+                "Contest %s is in progress, polling again in %ds", contest_id, delay
+            )
+
+    def poll(self, kind, sport):
+        start = time.monotonic()
+        # the database connection may have timed out since the last poll
+        close_old_connections()
+        try:
+            getattr(self, f"poll_{kind}")(sport)
+        except Exception:  # pylint: disable=broad-except
+            # keep polling the other sports, and this one next time
+            logger.exception("Polling %s for %s failed", kind, sport)
+        close_old_connections()
+        logger.info("Polled %s for %s in %.2fs", kind, sport, time.monotonic() - start)
+        # the requests of this poll only, and don't keep them forever
+        client.STATS.log_summary(reset=True)
+
+        # count from the start of the poll so that polls don't drift
+        self.schedule(kind, sport, start + self.intervals[kind])
+
+    def schedule(self, kind, sport, when):
+        # equal times run in INTERVALS order
+        priority = list(INTERVALS).index(kind)
+        self.scheduler.enterabs(when, priority, self.poll, (kind, sport))
+
+    def run(self):
+        """Poll every sport now and then on the intervals, until interrupted."""
+        now = time.monotonic()
+        for sport in self.sports:
+            for kind in INTERVALS:
+                self.schedule(kind, sport, now)
+        self.scheduler.run()
@@ -0,0 +1,93 @@
+"""
+Compact storage for the lineup of every entry in a contest.
+
+Rather than a row per entry (or per roster slot), each contest gets a single
+DKContestLineups row holding its entries as zlib compressed arrays, in
+standings order. Lineups are stored as small integer codes into the contest's
+distinct players, which rarely number more than 256, so a lineup usually takes
+one byte per roster slot before compression. Loading a contest is one query
+and a few decompressions, and scans over its lineups are NumPy operations.
+"""
+import logging
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+from results.models import DKContestLineups
+
+logger = logging.getLogger(__name__)
+
+# fixed width, little-endian types of the stored arrays
+PLAYER_ID_TYPE = np.dtype("<i4")
+ENTRY_ID_TYPE = np.dtype("<i8")
+RANK_TYPE = np.dtype("<i4")
+POINTS_TYPE = np.dtype("<i4")
+
+ContestLineups = namedtuple(
+    "ContestLineups",
+    # lineups is an (entries x roster size) array of player ids
+    ["entry_ids", "names", "ranks", "points", "lineups"],
+)
+
+
+def pack(values, dtype):
+    return zlib.compress(np.asarray(values, dtype=dtype).tobytes())
+
+
+def unpack(blob, dtype):
+    return np.frombuffer(zlib.decompress(bytes(blob)), dtype=dtype)
+
+
+def get_code_type(num_players):
+    return np.dtype("u1") if num_players <= 256 else np.dtype("<u2")
+
+
+def pack_contest_lineups(contest_lineups):
+    """Return the DKContestLineups fields storing @contest_lineups."""
+    lineups = contest_lineups.lineups
+    player_ids, codes = np.unique(lineups, return_inverse=True)
+    return {
+        "entries": lineups.shape[0],
+        "roster_size": lineups.shape[1],
+        "player_ids": pack(player_ids, PLAYER_ID_TYPE),
+        "lineups": pack(codes, get_code_type(len(player_ids))),
+        "entry_ids": pack(contest_lineups.entry_ids, ENTRY_ID_TYPE),
+        "ranks": pack(contest_lineups.ranks, RANK_TYPE),
+        "points": pack(np.round(contest_lineups.points * 100), POINTS_TYPE),
+        "names": zlib.compress("\n".join(contest_lineups.names).encode()),
+    }
+
+
+def unpack_contest_lineups(stored):
+    """Return the ContestLineups stored in a DKContestLineups."""
+    player_ids = unpack(stored.player_ids, PLAYER_ID_TYPE)
+    codes = unpack(stored.lineups, get_code_type(len(player_ids)))
+    names = zlib.decompress(bytes(stored.names)).decode()
+    return ContestLineups(
+        entry_ids=unpack(stored.entry_ids, ENTRY_ID_TYPE),
+        names=names.split("\n") if stored.entries else [],
+        ranks=unpack(stored.ranks, RANK_TYPE),
+        points=unpack(stored.points, POINTS_TYPE) / 100,
+        lineups=player_ids[codes].reshape(stored.entries, stored.roster_size),
+    )
+
+
+def save_contest_lineups(contest, contest_lineups):
+    """Store the ContestLineups of all of @contest's entries."""
+    DKContestLineups.objects.update_or_create(
+        contest=contest, defaults=pack_contest_lineups(contest_lineups)
+    )
+
+
+def load_contest_lineups(contest):
+    """Return the ContestLineups of @contest, or None if they weren't stored."""
+    try:
+        return unpack_contest_lineups(DKContestLineups.objects.get(contest=contest))
+    except DKContestLineups.DoesNotExist:
+        return None
+
+
+def get_entries_with_player(contest_lineups, player_id):
+    """Return the indexes of the entries whose lineup has @player_id."""
+    return np.flatnonzero((contest_lineups.lineups == player_id).any(axis=1))
@@ -1,9 +1,28 @@
+import argparse
+
 from django.core.management.base import BaseCommand
 
 import results.parsers.dkcontests as dkcontests_parser
 import results.parsers.dkresults as dkresults_parser
 import results.parsers.dksalaries as dksalaries_parser
-from results.utils import get_contest_ids, get_empty_contest_ids
+from results.daemon import INTERVALS, FetchDaemon
+from results.parsers import client
+from results.parsers.lobby import LOBBY_TTL, LobbySnapshot
+from results.utils import get_contest_ids, get_incomplete_contest_ids
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return number
+
+
+def non_negative_float(value):
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, not {value}")
+    return number
 
 
 class Command(BaseCommand):
@@ -20,8 +39,9 @@ class Command(BaseCommand):
             "-s",
             required=True,
             action="store",
-            dest="sport",
-            help="Sport name to pass to run()",
+            nargs="+",
+            dest="sports",
+            help="Sport names to pass to run()",
         )
         parser.add_argument(
             "--dk-new-contests",
@@ -57,29 +77,124 @@ class Command(BaseCommand):
             default=False,
             help="Update game, injury, and contest result data",
         )
+        parser.add_argument(
+            "--workers",
+            "-w",
+            action="store",
+            type=positive_int,
+            dest="workers",
+            default=1,
+            help="Number of contests to download concurrently",
+        )
+        parser.add_argument(
+            "--save-standings",
+            action="store_true",
+            dest="save_standings",
+            default=False,
+            help="Save standings exports before parsing them instead of "
+            "streaming them, so an interrupted ingest resumes after its last "
+            "committed row rather than starting over (always on with --workers "
+            "above 1)",
+        )
+        parser.add_argument(
+            "--salary-workers",
+            action="store",
+            type=positive_int,
+            dest="salary_workers",
+            default=1,
+            help="Number of draft group salary files to download concurrently",
+        )
+        parser.add_argument(
+            "--rate-limit",
+            action="store",
+            type=non_negative_float,
+            dest="rate_limit",
+            default=client.REQUESTS_PER_SECOND,
+            help="Requests per second to each host, 0 for no limit",
+        )
+        parser.add_argument(
+            "--lobby-ttl",
+            action="store",
+            type=int,
+            dest="lobby_ttl",
+            default=LOBBY_TTL,
+            help="Seconds to reuse a saved lobby for instead of downloading it",
+        )
+        parser.add_argument(
+            "--daemon",
+            "-d",
+            action="store_true",
+            dest="daemon",
+            default=False,
+            help="Keep running, polling contests, salaries and results",
+        )
+        for kind, interval in INTERVALS.items():
+            parser.add_argument(
+                f"--{kind}-interval",
+                action="store",
+                type=int,
+                dest=f"{kind}_interval",
+                default=interval,
+                help=f"Seconds between {kind} polls with --daemon",
+            )
 
     def handle(self, *args, **options):
-        sport = options["sport"]
+        client.RATE_LIMITER = client.RateLimiter(options["rate_limit"])
+        if options["daemon"]:
+            daemon = FetchDaemon(
+                options["sports"],
+                intervals={kind: options[f"{kind}_interval"] for kind in INTERVALS},
+                workers=options["workers"],
+                salary_workers=options["salary_workers"],
+                lobby_ttl=options["lobby_ttl"],
+            )
+            try:
+                daemon.run()
+            except KeyboardInterrupt:
+                pass
+        else:
+            for sport in options["sports"]:
+                self.fetch(sport, options)
+
+        client.STATS.log_summary()
+
+    def fetch(self, sport, options):
+        lobby = None
+        # contest discovery and salaries share one download of the lobby
+        if options["update"] or options["dk_salaries"] or options["dk_new_contests"]:
+            lobby = LobbySnapshot.fetch(sport, ttl=options["lobby_ttl"])
+
         if options["update"]:
-            dkcontests_parser.find_new_contests(sport)
+            dkcontests_parser.find_new_contests(sport, lobby=lobby)
             # injury_parser.run()
-            dksalaries_parser.run(sport)
+            dksalaries_parser.run(sport, workers=options["salary_workers"], lobby=lobby)
             dkresults_parser.run(
                 sport=sport,
-                contest_ids=get_empty_contest_ids(sport),
+                contest_ids=get_incomplete_contest_ids(sport),
                 contest=True,
                 resultscsv=True,
                 resultsparse=True,
+                workers=options["workers"],
+                stream=not options["save_standings"],
             )
         else:
             if options["dk_salaries"]:
-                dksalaries_parser.run(sport)
+                dksalaries_parser.run(
+                    sport, workers=options["salary_workers"], lobby=lobby
+                )
             if options["dk_new_contests"]:
-                dkcontests_parser.find_new_contests(sport)
+                dkcontests_parser.find_new_contests(sport, lobby=lobby)
             if options["dk_results"]:
-                dkresults_parser.run(sport=sport, contest_ids=options["dk_results"])
+                dkresults_parser.run(
+                    sport=sport,
+                    contest_ids=options["dk_results"],
+                    workers=options["workers"],
+                    stream=not options["save_standings"],
+                )
             if options["dk_results_limit"] > -1:
                 dkresults_parser.run(
                     sport=sport,
                     contest_ids=get_contest_ids(sport, options["dk_results_limit"]),
+                    workers=options["workers"],
+                    stream=not options["save_standings"],
                 )
@@ -0,0 +1,217 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from results.lineups import (
+    ContestLineups,
+    get_entries_with_player,
+    pack_contest_lineups,
+    unpack_contest_lineups,
+)
+from results.models import DKContestLineups
+
+# one row per entry and one row per roster slot, with the indexes needed to
+# load a contest or find the entries that have a player
+NAIVE_SCHEMA = """
+CREATE TABLE entry (
+    id INTEGER PRIMARY KEY,
+    contest_id INTEGER NOT NULL,
+    entry_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    points REAL NOT NULL
+);
+CREATE INDEX entry_contest_idx ON entry (contest_id, rank);
+CREATE TABLE lineup_slot (
+    id INTEGER PRIMARY KEY,
+    entry_id INTEGER NOT NULL REFERENCES entry (id),
+    slot INTEGER NOT NULL,
+    player_id INTEGER NOT NULL
+);
+CREATE INDEX lineup_slot_entry_idx ON lineup_slot (entry_id, slot);
+CREATE INDEX lineup_slot_player_idx ON lineup_slot (player_id, entry_id);
+"""
+COMPACT_SCHEMA = """
+CREATE TABLE contest_lineups (
+    contest_id INTEGER PRIMARY KEY,
+    entries INTEGER NOT NULL,
+    roster_size INTEGER NOT NULL,
+    player_ids BLOB NOT NULL,
+    lineups BLOB NOT NULL,
+    entry_ids BLOB NOT NULL,
+    ranks BLOB NOT NULL,
+    points BLOB NOT NULL,
+    names BLOB NOT NULL
+);
+"""
+COMPACT_FIELDS = [
+    "entries",
+    "roster_size",
+    "player_ids",
+    "lineups",
+    "entry_ids",
+    "ranks",
+    "points",
+    "names",
+]
+
+
+def generate_contest(rng, entries, players, roster_size, first_player_id):
+    """
+    Return ContestLineups of random lineups, drawing from @players players
+    with skewed popularity so that some lineups are duplicated.
+    """
+    weights = np.log(rng.pareto(1.5, players) + 1e-9)
+    lineups = np.empty((entries, roster_size), dtype=np.int64)
+    for start in range(0, entries, 10000):
+        stop = min(start + 10000, entries)
+        # weighted sampling without replacement with the Gumbel top-k trick
+        keys = weights + rng.gumbel(size=(stop - start, players))
+        picks = np.argpartition(-keys, roster_size, axis=1)[:, :roster_size]
+        lineups[start:stop] = np.sort(picks, axis=1) + first_player_id
+    return ContestLineups(
+        entry_ids=rng.integers(10 ** 9, 4 * 10 ** 9, entries),
+        names=[f"user{i}" for i in rng.integers(0, entries, entries)],
+        ranks=np.arange(1, entries + 1),
+        points=np.round(np.sort(rng.uniform(100, 400, entries))[::-1], 2),
+        lineups=lineups,
+    )
+
+
+def write_naive(db, contest_id, contest):
+    cursor = db.cursor()
+    first = cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entry").fetchone()[0]
+    cursor.executemany(
+        "INSERT INTO entry VALUES (?, ?, ?, ?, ?, ?)",
+        zip(
+            range(first, first + len(contest.ranks)),
+            [contest_id] * len(contest.ranks),
+            contest.entry_ids.tolist(),
+            contest.names,
+            contest.ranks.tolist(),
+            contest.points.tolist(),
+        ),
+    )
+    cursor.executemany(
+        "INSERT INTO lineup_slot (entry_id, slot, player_id) VALUES (?, ?, ?)",
+        (
+            (first + i, slot, player_id)
+            for i, lineup in enumerate(contest.lineups.tolist())
+            for slot, player_id in enumerate(lineup)
+        ),
+    )
+    db.commit()
+
+
+def load_naive(db, contest_id):
+    entries = db.execute(
+        "SELECT id, entry_id, name, rank, points FROM entry "
+        "WHERE contest_id = ? ORDER BY rank, id",
+        (contest_id,),
+    ).fetchall()
+    slots = db.execute(
+        "SELECT s.entry_id, s.player_id FROM entry e "
+        "JOIN lineup_slot s ON s.entry_id = e.id "
+        "WHERE e.contest_id = ? ORDER BY e.rank, e.id, s.slot",
+        (contest_id,),
+    ).fetchall()
+    return entries, slots
+
+
+def find_naive(db, contest_id, player_id):
+    return db.execute(
+        "SELECT e.entry_id FROM lineup_slot s JOIN entry e ON e.id = s.entry_id "
+        "WHERE s.player_id = ? AND e.contest_id = ?",
+        (player_id, contest_id),
+    ).fetchall()
+
+
+def write_compact(db, contest_id, contest):
+    fields = pack_contest_lineups(contest)
+    db.execute(
+        "INSERT INTO contest_lineups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [contest_id] + [fields[f] for f in COMPACT_FIELDS],
+    )
+    db.commit()
+
+
+def load_compact(db, contest_id):
+    row = db.execute(
+        f"SELECT {', '.join(COMPACT_FIELDS)} FROM contest_lineups "
+        "WHERE contest_id = ?",
+        (contest_id,),
+    ).fetchone()
+    return unpack_contest_lineups(DKContestLineups(**dict(zip(COMPACT_FIELDS, row))))
+
+
+def find_compact(db, contest_id, player_id):
+    contest = load_compact(db, contest_id)
+    return contest.entry_ids[get_entries_with_player(contest, player_id)]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the database size and load/scan speed of the compact lineup "
+        "storage against a row per roster slot, on synthetic contests"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--contests", type=int, default=10)
+        parser.add_argument("--entries", type=int, default=100000)
+        parser.add_argument("--players", type=int, default=150)
+        parser.add_argument("--roster-size", type=int, default=8)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        contests = [
+            generate_contest(
+                rng,
+                options["entries"],
+                options["players"],
+                options["roster_size"],
+                contest_id * options["players"],
+            )
+            for contest_id in range(options["contests"])
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, schema, write, load, find in (
+                ("row per slot", NAIVE_SCHEMA, write_naive, load_naive, find_naive),
+                ("compact", COMPACT_SCHEMA, write_compact, load_compact, find_compact),
+            ):
+                path = os.path.join(tmpdir, f"{name}.sqlite3")
+                db = sqlite3.connect(path)
+                db.executescript(schema)
+
+                write_time = 0
+                for contest_id, contest in enumerate(contests):
+                    _, elapsed = timed(write, db, contest_id, contest)
+                    write_time += elapsed
+                db.execute("VACUUM")
+
+                # a contest in the middle and its most common player
+                contest_id = len(contests) // 2
+                counts = np.bincount(contests[contest_id].lineups.ravel())
+                player_id = int(counts.argmax())
+                _, load_time = timed(load, db, contest_id)
+                found, find_time = timed(find, db, contest_id, player_id)
+                db.close()
+
+                self.stdout.write(
+                    f"{name}: {os.path.getsize(path) / 1024 / 1024:.1f} MB, "
+                    f"written in {write_time:.2f}s, "
+                    f"contest loaded in {load_time * 1000:.0f}ms, "
+                    f"{len(found)} entries with a player found in "
+                    f"{find_time * 1000:.0f}ms"
+                )
@@ -0,0 +1,102 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from results.parsers.dkcontests import Contest, ContestIndex, match_contest_criteria
+from results.parsers.lobby import DECODERS, LobbySnapshot
+
+# (entry fee, query, exclude) lookups timed against the lobby
+LOOKUPS = [
+    (fee, query, exclude)
+    for fee in [0.25, 1, 3, 5, 10, 25, 50, 100]
+    for query, exclude in [(None, None), ("Double Up", None), (None, "Satellite")]
+]
+
+
+def scan_largest_contest(contests, entry_fee, query, exclude):
+    """Find the largest contest by scanning the whole lobby."""
+    contest_list = [
+        c for c in contests if match_contest_criteria(c, entry_fee, query, exclude)
+    ]
+    if contest_list:
+        return max(contest_list, key=lambda x: x.entries)
+    return None
+
+
+def vars_of(contest):
+    return [getattr(contest, name) for name in Contest.__slots__]
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat
+
+
+class Command(BaseCommand):
+    help = (
+        "Time decoding a recorded lobby JSON with each available decoder, and "
+        "compare selecting the largest contests with ContestIndex against "
+        "scanning the lobby for each entry fee"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("filename", help="Recorded getcontests response")
+        parser.add_argument(
+            "--repeat",
+            action="store",
+            type=int,
+            dest="repeat",
+            default=10,
+            help="Number of times to run each step",
+        )
+
+    def handle(self, *args, **options):
+        with open(options["filename"], "rb") as file:
+            content = file.read()
+        repeat = options["repeat"]
+
+        decoded = {}
+        for name, decode in DECODERS.items():
+            response, decode_time = timed(lambda: decode(content), repeat)
+            decoded[name] = LobbySnapshot("bench", response)
+            self.stdout.write(
+                f"{name}: {len(content) / 1024 / 1024:.1f} MB decoded in "
+                f"{decode_time * 1000:.2f}ms"
+            )
+        lobby = decoded["json"]
+        # decoders can skip fields, so compare the ones Contest reads
+        fields = [vars_of(Contest(c)) for c in lobby.contests]
+        for name, other in decoded.items():
+            if [vars_of(Contest(c)) for c in other.contests] != fields:
+                raise CommandError(f"{name} decoded different contests than json")
+
+        contests, parse_time = timed(
+            lambda: [Contest(c) for c in lobby.contests], repeat
+        )
+        index, index_time = timed(lambda: ContestIndex(contests), repeat)
+        expected, scan_time = timed(
+            lambda: [scan_largest_contest(contests, *l) for l in LOOKUPS], repeat
+        )
+        result, lookup_time = timed(
+            lambda: [index.get_largest(*l) for l in LOOKUPS], repeat
+        )
+
+        mismatches = [
+            f"{lookup}: {a and a.id} != {b and b.id}"
+            for lookup, a, b in zip(LOOKUPS, result, expected)
+            if a is not b
+        ]
+        if mismatches:
+            raise CommandError("Selections differ:\n" + "\n".join(mismatches))
+
+        self.stdout.write(
+            f"{len(contests)} contests parsed in {parse_time * 1000:.2f}ms, "
+            f"indexed in {index_time * 1000:.2f}ms"
+        )
+        self.stdout.write(
+            f"{len(LOOKUPS)} lookups: scan {scan_time * 1000:.2f}ms, "
+            f"index {lookup_time * 1000:.3f}ms "
+            f"({scan_time / lookup_time:.0f}x), identical"
+        )
@@ -0,0 +1,80 @@
+import time
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand, CommandError
+
+from results.parsers.dkresults import (
+    is_contest_header,
+    is_prize_cell,
+    parse_contest_page,
+    parse_prize_page,
+)
+from results.parsers.pages import extract
+
+# page kind => (parse function, extract() match function)
+PAGES = {
+    "gamecenter": (parse_contest_page, is_contest_header),
+    "detailspop": (parse_prize_page, is_prize_cell),
+}
+
+
+def parse_or_missing(parse, page):
+    try:
+        return parse(page)
+    except IndexError:
+        return "missing"
+
+
+def time_parse(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the targeted page extractor parses saved gamecenter and "
+        "detailspop pages exactly like html5lib, and time both"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Saved HTML pages")
+        parser.add_argument(
+            "--repeat",
+            action="store",
+            type=int,
+            dest="repeat",
+            default=10,
+            help="Number of times to parse each page",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = []
+        for filename in options["files"]:
+            with open(filename, encoding="utf8") as file:
+                html = file.read()
+
+            for kind, (parse, match) in PAGES.items():
+                expected, html5lib_time = time_parse(
+                    lambda: parse_or_missing(parse, BeautifulSoup(html, "html5lib")),
+                    options["repeat"],
+                )
+                result, extract_time = time_parse(
+                    lambda: parse_or_missing(parse, extract(html, match)),
+                    options["repeat"],
+                )
+                if result != expected:
+                    mismatches.append(f"{filename} ({kind}): {result} != {expected}")
+                if expected == "missing":
+                    continue
+
+                self.stdout.write(
+                    f"{filename} ({kind}): html5lib {html5lib_time * 1000:.2f}ms, "
+                    f"extract {extract_time * 1000:.2f}ms "
+                    f"({html5lib_time / extract_time:.1f}x), "
+                    f"{'identical' if result == expected else 'DIFFERENT'}"
+                )
+
+        if mismatches:
+            raise CommandError("Outputs differ:\n" + "\n".join(mismatches))
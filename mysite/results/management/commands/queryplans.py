@@ -0,0 +1,120 @@
+import datetime
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import IntegerField
+from django.db.models.functions import Coalesce
+
+from results.models import DKContest, DKResult, DKResultOwnership, DKSalary, Player
+from results.utils import count_related
+
+# "SCAN results_player" (or "SCAN TABLE results_player" on older SQLite)
+# without an index is a full table scan
+FULL_SCAN = re.compile(r"\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)")
+
+
+def get_hot_queries(sport):
+    """Return (description, queryset) pairs for the app's hot queries."""
+    today = datetime.date.today()
+    return [
+        (
+            "utils.get_contest_report",
+            DKContest.objects.filter(
+                date__gte=today - datetime.timedelta(days=7), sport__exact=sport
+            ),
+        ),
+        (
+            "utils.get_contest_ids",
+            DKContest.objects.filter(
+                sport__exact=sport,
+                date__gte=today - datetime.timedelta(days=1),
+                entry_fee=25,
+            ),
+        ),
+        (
+            "views.index",
+            DKContest.objects.select_related("summary")
+            .annotate(
+                num_results=Coalesce(
+                    "summary__num_results",
+                    count_related(DKResult),
+                    output_field=IntegerField(),
+                )
+            )
+            .order_by("-date"),
+        ),
+        (
+            "summary.build_contest_summary results",
+            DKResult.objects.filter(contest_id=1).order_by("rank"),
+        ),
+        (
+            "summary.build_contest_summary ownership",
+            DKResultOwnership.objects.filter(contest_id=1)
+            .select_related("player")
+            .order_by("-ownership"),
+        ),
+        (
+            "summary.get_salaries",
+            DKSalary.objects.filter(draft_group_id__exact=1).values_list(
+                "player_id", "player__name", "salary"
+            ),
+        ),
+        ("Player.get_by_name", Player.objects.filter(name__iexact="LeBron James")),
+        (
+            "PlayerNameIndex.for_sport",
+            Player.objects.filter(sport__exact=sport).order_by("pk"),
+        ),
+        (
+            "dksalaries.get_players",
+            Player.objects.filter(sport=sport, team_abbv__in=["LAL", "BOS"]),
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the SQLite query plan and run time of the app's hot queries and "
+        "fail if any of them scans a whole table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sport",
+            "-s",
+            action="store",
+            dest="sport",
+            default="NBA",
+            help="Sport to use in the queries",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            dest="analyze",
+            default=False,
+            help="Run ANALYZE first so plans use the table statistics",
+        )
+
+    def handle(self, *args, **options):
+        if options["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        scans = []
+        for description, queryset in get_hot_queries(options["sport"]):
+            plan = queryset.explain()
+            start = time.perf_counter()
+            rows = len(list(queryset))
+            elapsed = time.perf_counter() - start
+
+            self.stdout.write(f"{description} ({rows} rows in {elapsed * 1000:.1f}ms)")
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
+                match = FULL_SCAN.search(line)
+                if match:
+                    scans.append(f"{description}: {match.group(1)}")
+
+        if scans:
+            raise CommandError("Full table scans found:\n" + "\n".join(scans))
+        self.stdout.write("No full table scans found")
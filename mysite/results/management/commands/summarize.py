@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from results.models import DKContest
+from results.summary import materialize_contest_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed summaries of contests"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sport",
+            "-s",
+            action="store",
+            dest="sport",
+            help="Only rebuild the summaries of this sport's contests",
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            dest="missing",
+            default=False,
+            help="Only build summaries for contests that don't have one",
+        )
+
+    def handle(self, *args, **options):
+        contests = DKContest.objects.all()
+        if options["sport"]:
+            contests = contests.filter(sport__exact=options["sport"])
+        if options["missing"]:
+            contests = contests.filter(summary__isnull=True)
+        materialize_contest_summaries(contests)
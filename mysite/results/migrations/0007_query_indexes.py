@@ -0,0 +1,44 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0006_dkcontest_draft_group_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dkcontest',
+            index=models.Index(fields=['sport', 'date'], name='dkcontest_sport_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dkcontest',
+            index=models.Index(fields=['date'], name='dkcontest_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dkresult',
+            index=models.Index(fields=['contest', 'rank'], name='dkresult_contest_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dkresultownership',
+            index=models.Index(fields=['contest', 'ownership'], name='dkresultown_contest_own_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dksalary',
+            index=models.Index(fields=['draft_group_id'], name='dksalary_dg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['sport', 'team_abbv', 'name'], name='player_sport_team_name_idx'),
+        ),
+        # Case-insensitive index for the name__iexact lookups in
+        # Player.get_by_name, which Django runs as LIKE on SQLite. Django 2.2
+        # can't declare expression indexes, so it's created in raw SQL.
+        migrations.RunSQL(
+            'CREATE INDEX player_name_nocase_idx ON results_player (name COLLATE NOCASE)',
+            reverse_sql='DROP INDEX player_name_nocase_idx',
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DKStandingsIngest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(blank=True, max_length=64, null=True)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('last_offset', models.PositiveIntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contest', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='standings_ingest', to='results.DKContest')),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0008_dkstandingsingest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DKStandingsDownload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etag', models.CharField(blank=True, max_length=200, null=True)),
+                ('last_modified', models.CharField(blank=True, max_length=50, null=True)),
+                ('content_hash', models.CharField(blank=True, max_length=64, null=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('contest_completed', models.BooleanField(default=False)),
+                ('bytes_saved', models.BigIntegerField(default=0)),
+                ('downloaded_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contest', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='standings_download', to='results.DKContest')),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0009_standings_download_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DKContestLineupStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entries', models.PositiveIntegerField()),
+                ('top_entries', models.PositiveIntegerField()),
+                ('unique_lineups', models.PositiveIntegerField()),
+                ('duplicated_entries', models.PositiveIntegerField()),
+                ('max_duplicates', models.PositiveIntegerField()),
+                ('unknown_players', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contest', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='lineup_stat', to='results.DKContest')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DKContestStack',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team_abbv', models.CharField(max_length=20)),
+                ('size', models.PositiveSmallIntegerField()),
+                ('entries', models.PositiveIntegerField()),
+                ('frequency', models.FloatField()),
+                ('top_frequency', models.FloatField()),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stacks', to='results.DKContest')),
+            ],
+            options={
+                'unique_together': {('contest', 'team_abbv', 'size')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DKContestPlayerStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ownership', models.FloatField()),
+                ('top_ownership', models.FloatField()),
+                ('leverage', models.FloatField()),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='player_stats', to='results.DKContest')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='contest_stats', to='results.Player')),
+            ],
+            options={
+                'unique_together': {('contest', 'player')},
+            },
+        ),
+    ]
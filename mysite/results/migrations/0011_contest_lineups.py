@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0010_lineup_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DKContestLineups',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entries', models.PositiveIntegerField()),
+                ('roster_size', models.PositiveSmallIntegerField()),
+                ('player_ids', models.BinaryField()),
+                ('lineups', models.BinaryField()),
+                ('entry_ids', models.BinaryField()),
+                ('ranks', models.BinaryField()),
+                ('points', models.BinaryField()),
+                ('names', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contest', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='lineups', to='results.DKContest')),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0011_contest_lineups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DKContestSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('num_results', models.PositiveIntegerField(default=0)),
+                ('num_entries', models.PositiveIntegerField(default=0)),
+                ('top_score', models.FloatField(blank=True, null=True)),
+                ('cash_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('cash_line', models.FloatField(blank=True, null=True)),
+                ('salary_weighted_ownership', models.FloatField(blank=True, null=True)),
+                ('winning_salary', models.PositiveIntegerField(blank=True, null=True)),
+                ('chalk', models.TextField(default='[]')),
+                ('ownership', models.TextField(default='[]')),
+                ('results', models.TextField(default='[]')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contest', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='summary', to='results.DKContest')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0012_contest_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['sport'], name='player_sport_idx'),
+        ),
+    ]
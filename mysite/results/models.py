@@ -16,6 +16,17 @@ class Player(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # dksalaries.write_players
+            models.Index(
+                fields=["sport", "team_abbv", "name"], name="player_sport_team_name_idx"
+            ),
+            # PlayerNameIndex.for_sport, whose entries of a sport are in pk
+            # order so the players don't have to be sorted
+            models.Index(fields=["sport"], name="player_sport_idx"),
+        ]
+
     @classmethod
     def get_by_name(cls, name):
         # try getting exactly the name (case-insensitive)
@@ -73,6 +84,7 @@ class DKSalary(models.Model):
     class Meta:
         # unique_together = ("player", "date")
         unique_together = ("player", "draft_group_id")
+        indexes = [models.Index(fields=["draft_group_id"], name="dksalary_dg_idx")]
 
     def __str__(self):
         return "DKSalary: player: {} salary: {} dg: {}".format(
@@ -97,6 +109,12 @@ class DKContest(models.Model):
     #     DKSalary, related_name="dk_salaries", on_delete=models.PROTECT
     # )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["sport", "date"], name="dkcontest_sport_date_idx"),
+            models.Index(fields=["date"], name="dkcontest_date_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.date})"
 
@@ -145,6 +163,11 @@ class DKResult(models.Model):
     #     Player, related_name="dk_util_results", on_delete=models.PROTECT
     # )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["contest", "rank"], name="dkresult_contest_rank_idx")
+        ]
+
     # def get_lineup(self):
     #     return [self.pg, self.sg, self.sf, self.pf, self.c, self.g, self.f, self.util]
 
@@ -177,6 +200,174 @@ class DKResultOwnership(models.Model):
 
     class Meta:
         unique_together = ("contest", "player")
+        indexes = [
+            models.Index(
+                fields=["contest", "ownership"], name="dkresultown_contest_own_idx"
+            )
+        ]
 
     def __str__(self):
         return f"{self.contest} - {self.player} - {self.ownership} - {self.fpts}"
+
+
+class DKStandingsIngest(models.Model):
+    """Progress of loading a contest's standings file into the database."""
+
+    contest = models.OneToOneField(
+        DKContest, related_name="standings_ingest", on_delete=models.PROTECT
+    )
+    # sha256 of the standings CSV
+    file_hash = models.CharField(max_length=64, null=True, blank=True)
+    rows_processed = models.PositiveIntegerField(default=0)
+    # standings rows up to and including this one have been committed
+    last_offset = models.PositiveIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.contest} - {self.last_offset} rows - {self.completed}"
+
+
+class DKStandingsDownload(models.Model):
+    """Cache entry for the last download of a contest's standings export."""
+
+    contest = models.OneToOneField(
+        DKContest, related_name="standings_download", on_delete=models.PROTECT
+    )
+    etag = models.CharField(max_length=200, null=True, blank=True)
+    last_modified = models.CharField(max_length=50, null=True, blank=True)
+    # sha256 of the standings CSV
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    # bytes transferred for the last full download
+    size = models.BigIntegerField(default=0)
+    # the contest was completed when the export was downloaded, so it's final
+    contest_completed = models.BooleanField(default=False)
+    # bytes not downloaded thanks to this entry
+    bytes_saved = models.BigIntegerField(default=0)
+
+    downloaded_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.contest} - {self.etag} - {self.contest_completed}"
+
+
+class DKContestLineupStat(models.Model):
+    """Lineup duplication across a contest's entries (see results.analytics)."""
+
+    contest = models.OneToOneField(
+        DKContest, related_name="lineup_stat", on_delete=models.PROTECT
+    )
+    entries = models.PositiveIntegerField()
+    # entries in the top TOP_FRACTION of the standings
+    top_entries = models.PositiveIntegerField()
+    unique_lineups = models.PositiveIntegerField()
+    # entries whose lineup was also used by another entry
+    duplicated_entries = models.PositiveIntegerField()
+    # most entries using the same lineup
+    max_duplicates = models.PositiveIntegerField()
+    # roster slots whose player couldn't be found
+    unknown_players = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.contest} - {self.unique_lineups}/{self.entries} unique"
+
+
+class DKContestPlayerStat(models.Model):
+    contest = models.ForeignKey(
+        DKContest, related_name="player_stats", on_delete=models.PROTECT
+    )
+    player = models.ForeignKey(
+        Player, related_name="contest_stats", on_delete=models.PROTECT
+    )
+    ownership = models.FloatField()
+    # ownership among the top entries
+    top_ownership = models.FloatField()
+    # top_ownership - ownership
+    leverage = models.FloatField()
+
+    class Meta:
+        unique_together = ("contest", "player")
+
+    def __str__(self):
+        return f"{self.contest} - {self.player} - {self.ownership} - {self.leverage}"
+
+
+class DKContestStack(models.Model):
+    """Entries rostering exactly @size players from a team."""
+
+    contest = models.ForeignKey(
+        DKContest, related_name="stacks", on_delete=models.PROTECT
+    )
+    team_abbv = models.CharField(max_length=20)
+    size = models.PositiveSmallIntegerField()
+    entries = models.PositiveIntegerField()
+    frequency = models.FloatField()
+    # frequency among the top entries
+    top_frequency = models.FloatField()
+
+    class Meta:
+        unique_together = ("contest", "team_abbv", "size")
+
+    def __str__(self):
+        return f"{self.contest} - {self.team_abbv} x{self.size} - {self.frequency}"
+
+
+class DKContestLineups(models.Model):
+    """
+    Every entry of a contest, in standings order, as zlib compressed arrays
+    (see results.lineups).
+    """
+
+    contest = models.OneToOneField(
+        DKContest, related_name="lineups", on_delete=models.PROTECT
+    )
+    entries = models.PositiveIntegerField()
+    roster_size = models.PositiveSmallIntegerField()
+    # distinct player ids (int32), indexed by the codes in lineups
+    player_ids = models.BinaryField()
+    # roster_size player codes per entry (uint8, or uint16 for over 256 players)
+    lineups = models.BinaryField()
+    entry_ids = models.BinaryField()
+    ranks = models.BinaryField()
+    # hundredths of a point
+    points = models.BinaryField()
+    # newline separated entry names
+    names = models.BinaryField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.contest} - {self.entries} lineups"
+
+
+class DKContestSummary(models.Model):
+    """
+    Precomputed aggregates and page data of a contest (see results.summary),
+    refreshed whenever its results, ownership, payouts or salaries change.
+    """
+
+    contest = models.OneToOneField(
+        DKContest, related_name="summary", on_delete=models.PROTECT
+    )
+    num_results = models.PositiveIntegerField(default=0)
+    num_entries = models.PositiveIntegerField(default=0)
+    top_score = models.FloatField(null=True, blank=True)
+    # last paid rank and its score
+    cash_rank = models.PositiveIntegerField(null=True, blank=True)
+    cash_line = models.FloatField(null=True, blank=True)
+    # sum of ownership * salary, i.e. the salary used by the average lineup
+    salary_weighted_ownership = models.FloatField(null=True, blank=True)
+    winning_salary = models.PositiveIntegerField(null=True, blank=True)
+    # JSON lists: the most owned players, and the rows of the detail page
+    chalk = models.TextField(default="[]")
+    ownership = models.TextField(default="[]")
+    results = models.TextField(default="[]")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.contest} - {self.top_score} - {self.cash_line}"
@@ -0,0 +1,208 @@
+"""
+Shared HTTP client for the DraftKings parsers.
+
+All requests go through a single pooled requests.Session so connections are
+kept alive between calls, failed requests are retried with backoff and every
+request is rate limited per host and timed.
+"""
+
+import http.cookiejar
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "Accept": "*/*",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept-Language": "en-US,en;q=0.8",
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Pragma": "no-cache",
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_5) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/48.0.2564.97 Safari/537.36"
+    ),
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+# (connect, read) timeouts in seconds
+TIMEOUT = (10, 60)
+# retries for connection errors and 429/5xx responses, sleeping
+# BACKOFF_FACTOR * 2 ** (retry - 1) seconds between attempts
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# connections kept open per host
+POOL_SIZE = 10
+# per-host limit on requests, 0 for no limit
+REQUESTS_PER_SECOND = float(os.environ.get("DK_REQUESTS_PER_SECOND", 4))
+# where to load draftkings.com cookies from (see COOKIE_LOADERS)
+COOKIE_SOURCE = os.environ.get("DK_COOKIE_SOURCE", "browser")
+# Netscape/Mozilla cookies.txt file for the "file" source
+COOKIE_FILE = os.environ.get("DK_COOKIE_FILE", "cookies.txt")
+
+
+class RateLimiter:
+    """Space out the start of requests to the same host across threads."""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1 / requests_per_second if requests_per_second else 0
+        self.lock = threading.Lock()
+        self.next_request = defaultdict(float)
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            start = max(time.monotonic(), self.next_request[host])
+            self.next_request[host] = start + self.interval
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LatencyStats:
+    """Request counts and latencies grouped by endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # endpoint => [count, total seconds, max seconds]
+        self.requests = {}
+
+    @staticmethod
+    def get_endpoint(url):
+        # group e.g. /contest/gamecenter/123 and /contest/gamecenter/456
+        return re.sub(r"\d+", "{id}", urlsplit(url).path)
+
+    def record(self, url, elapsed):
+        with self.lock:
+            stats = self.requests.setdefault(self.get_endpoint(url), [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+
+    def summary(self, reset=False):
+        """
+        Return endpoint => (count, mean seconds, max seconds), and start
+        counting from scratch if @reset.
+        """
+        with self.lock:
+            summary = {
+                endpoint: (count, total / count, slowest)
+                for endpoint, (count, total, slowest) in self.requests.items()
+            }
+            if reset:
+                self.requests.clear()
+        return summary
+
+    def log_summary(self, reset=False):
+        for endpoint, (count, mean, slowest) in sorted(self.summary(reset).items()):
+            logger.info(
+                "%s: %d requests, %.3fs mean, %.3fs max", endpoint, count, mean, slowest
+            )
+
+
+def load_browser_cookies():
+    # browsercookie decrypts the browser's cookie database, so only import it
+    # when cookies are actually needed
+    import browsercookie  # pylint: disable=import-outside-toplevel
+
+    return browsercookie.chrome()
+
+
+def load_file_cookies():
+    jar = http.cookiejar.MozillaCookieJar(COOKIE_FILE)
+    jar.load(ignore_discard=True, ignore_expires=True)
+    return jar
+
+
+def load_env_cookies():
+    """Load cookies from a "name=value; name2=value2" DK_COOKIES variable."""
+    cookies = os.environ.get("DK_COOKIES", "").split(";")
+    pairs = [cookie.split("=", 1) for cookie in cookies if "=" in cookie]
+    return requests.cookies.cookiejar_from_dict(
+        {name.strip(): value.strip() for name, value in pairs}
+    )
+
+
+# cookie source name => function returning a CookieJar
+COOKIE_LOADERS = {
+    "browser": load_browser_cookies,
+    "file": load_file_cookies,
+    "env": load_env_cookies,
+}
+
+LOCK = threading.Lock()
+COOKIES = None
+SESSION = None
+
+
+def get_cookies():
+    """Load cookies from COOKIE_SOURCE on first use and cache them."""
+    global COOKIES  # pylint: disable=global-statement
+    with LOCK:
+        if COOKIES is None:
+            start = time.perf_counter()
+            COOKIES = COOKIE_LOADERS[COOKIE_SOURCE]()
+            logger.debug(
+                "Loaded %d cookies from %s in %.3fs",
+                len(COOKIES),
+                COOKIE_SOURCE,
+                time.perf_counter() - start,
+            )
+    return COOKIES
+
+
+def create_session():
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.cookies.update(get_cookies())
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Return the shared session, creating it on first use."""
+    global SESSION  # pylint: disable=global-statement
+    if SESSION is None:
+        session = create_session()
+        with LOCK:
+            if SESSION is None:
+                SESSION = session
+    return SESSION
+
+
+RATE_LIMITER = RateLimiter(REQUESTS_PER_SECOND)
+STATS = LatencyStats()
+
+
+def get(url, **kwargs):
+    """Rate limited, timed GET through the shared session."""
+    kwargs.setdefault("timeout", TIMEOUT)
+    RATE_LIMITER.wait(url)
+    start = time.perf_counter()
+    response = get_session().get(url, **kwargs)
+    elapsed = time.perf_counter() - start
+    STATS.record(url, elapsed)
+    logger.debug("GET %s [%s] in %.3fs", response.url, response.status_code, elapsed)
+    return response
@@ -2,33 +2,29 @@ import datetime
 import logging
 import re
 
-import browsercookie
-import requests
 from django.utils.timezone import make_aware
 
-from results.models import DKContest
+from results.contests import write_contests
+from results.parsers.lobby import LobbySnapshot
 
 logger = logging.getLogger(__name__)
 
-COOKIES = browsercookie.chrome()
-HEADERS = {
-    "Accept": "*/*",
-    "Accept-Encoding": "gzip, deflate, sdch",
-    "Accept-Language": "en-US,en;q=0.8",
-    "Cache-Control": "no-cache",
-    "Connection": "keep-alive",
-    "Host": "www.draftkings.com",
-    "Pragma": "no-cache",
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_5) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/48.0.2564.97 Safari/537.36"
-    ),
-    "X-Requested-With": "XMLHttpRequest",
-}
-
 
 class Contest:
+    __slots__ = (
+        "start_date",
+        "name",
+        "id",
+        "draft_group",
+        "total_prizes",
+        "entries",
+        "entry_fee",
+        "entry_count",
+        "max_entry_count",
+        "is_guaranteed",
+        "is_double_up",
+    )
+
     def __init__(self, contest):
         self.start_date = contest["sd"]
         self.name = contest["n"]
@@ -39,16 +35,25 @@ class Contest:
         self.entry_fee = contest["a"]
         self.entry_count = contest["ec"]
         self.max_entry_count = contest["mec"]
-        self.is_guaranteed = False
-        self.is_double_up = False
-
-        self.start_dt = self.get_dt_from_timestamp(self.start_date)
 
-        if "IsDoubleUp" in contest["attr"]:
-            self.is_double_up = contest["attr"]["IsDoubleUp"]
-
-        if "IsGuaranteed" in contest["attr"]:
-            self.is_guaranteed = contest["attr"]["IsGuaranteed"]
+        attr = contest["attr"]
+        self.is_double_up = attr.get("IsDoubleUp", False)
+        self.is_guaranteed = attr.get("IsGuaranteed", False)
+
+    @property
+    def start_dt(self):
+        # only parsed for the contests that are saved
+        return self.get_dt_from_timestamp(self.start_date)
+
+    @property
+    def key(self):
+        """Return the ContestIndex key of this contest."""
+        return (
+            self.entry_fee,
+            self.max_entry_count == 1,
+            bool(self.is_double_up),
+            bool(self.is_guaranteed),
+        )
 
     @staticmethod
     def get_dt_from_timestamp(timestamp: str):
@@ -60,22 +65,57 @@ class Contest:
         return f"{self.name} [{self.id}] [{self.start_dt}]"
 
 
+class ContestIndex:
+    """
+    Lobby Contests grouped by (entry fee, single entry, double up, guaranteed),
+    largest first, so that finding the largest contest of a kind is a
+    dictionary lookup instead of a scan of the whole lobby.
+    """
+
+    def __init__(self, contests):
+        self.contests = contests
+        self.index = {}
+        for contest in contests:
+            self.index.setdefault(contest.key, []).append(contest)
+        for group in self.index.values():
+            # stable, so ties keep lobby order like max() does
+            group.sort(key=lambda x: x.entries, reverse=True)
+
+    def __len__(self):
+        return len(self.contests)
+
+    def get(self, entry_fee, single_entry=True, double_up=True, guaranteed=True):
+        """Return the Contests of a kind, largest first."""
+        return self.index.get((entry_fee, single_entry, double_up, guaranteed), [])
+
+    def get_largest(self, entry_fee=25, query=None, exclude=None):
+        """Return the largest single entry, guaranteed double up, or None."""
+        for contest in self.get(entry_fee):
+            if match_contest_name(contest, query, exclude):
+                return contest
+        return None
+
+
 def get_largest_contest(contests, entry_fee=25, query=None, exclude=None):
-    """Return largest contest from a list of Contests."""
+    """Return largest contest from a list of Contests or a ContestIndex."""
     logger.debug("contests size: %d", len(contests))
 
-    # add contest to list if it matches criteria
-    contest_list = [
-        c for c in contests if match_contest_criteria(c, entry_fee, query, exclude)
-    ]
+    if not isinstance(contests, ContestIndex):
+        contests = ContestIndex(contests)
+
+    return contests.get_largest(entry_fee, query, exclude)
+
 
-    logger.debug("number of contests meeting requirements: %d", len(contest_list))
+def match_contest_name(contest, query=None, exclude=None):
+    # if exclude is in the name, return false
+    if exclude and exclude in contest.name:
+        return False
 
-    # sorted_list = sorted(contest_list, key=lambda x: x.entries, reverse=True)
-    if contest_list:
-        return max(contest_list, key=lambda x: x.entries)
+    # if query is not in the name, return false
+    if query and query not in contest.name:
+        return False
 
-    return None
+    return True
 
 
 def match_contest_criteria(contest, entry_fee=25, query=None, exclude=None):
@@ -87,37 +127,15 @@ def match_contest_criteria(contest, entry_fee=25, query=None, exclude=None):
         and contest.is_double_up
         and contest.is_guaranteed
     ):
-        # if exclude is in the name, return false
-        if exclude and exclude in contest.name:
-            return False
-
-        # if query is not in the name, return false
-        if query and query not in contest.name:
-            return False
-
-        return True
+        return match_contest_name(contest, query, exclude)
 
     return False
 
 
-def get_contests(url):
-    logger.info("url: %s", url)
-
-    response = requests.get(url, headers=HEADERS, cookies=COOKIES).json()
-    response_contests = {}
-    if isinstance(response, list):
-        response_contests = response
-    elif "Contests" in response:
-        response_contests = response["Contests"]
-    else:
-        raise Exception("response isn't a dict or a list???")
-
-    return response_contests
-
-
-def find_new_contests(sport):
+def find_new_contests(sport, lobby=None):
     """
     Maybe this belongs in another module
+    @param lobby [LobbySnapshot]: fetched if not given
     """
 
     # def get_pst_from_timestamp(timestamp_str):
@@ -126,13 +144,11 @@ def find_new_contests(sport):
     #         timestamp / 1000, timezone("America/Los_Angeles")
     #     )
 
-    url = f"https://www.draftkings.com/lobby/getcontests?sport={sport}"
-
-    # response = requests.get(url, headers=HEADERS, cookies=COOKIES).json()
-    response_contests = get_contests(url)
+    if lobby is None:
+        lobby = LobbySnapshot.fetch(sport)
 
-    # create list of Contest objects
-    contests = [Contest(c) for c in response_contests]
+    # index Contest objects by kind for the entry fee lookups below
+    contests = ContestIndex([Contest(c) for c in lobby.contests])
     # contests = [
     #     get_largest_contest(response["Contests"], 3),
     #     get_largest_contest(response["Contests"], 0.25),
@@ -152,22 +168,20 @@ def find_new_contests(sport):
             logger.debug("Appending contest %s", largest_contest)
             target_contests.append(largest_contest)
 
+    contest_fields = {}
     for contest in target_contests:
         date_time = contest.start_dt
         # make naive datetime aware based on django settings
         aware_datetime = make_aware(date_time)
-        dkcontest, created = DKContest.objects.update_or_create(
-            dk_id=contest.id,
-            defaults={
-                "date": aware_datetime.date(),
-                "datetime": aware_datetime,
-                "sport": sport,
-                "name": contest.name,
-                "draft_group_id": contest.draft_group,
-                "total_prizes": contest.total_prizes,
-                "entries": contest.entries,
-                "entry_fee": contest.entry_fee,
-            },
-        )
-        if created:
-            logger.info("Creating DKContest %s", dkcontest)
+        contest_fields[contest.id] = {
+            "date": aware_datetime.date(),
+            "datetime": aware_datetime,
+            "sport": sport,
+            "name": contest.name,
+            "draft_group_id": contest.draft_group,
+            "total_prizes": contest.total_prizes,
+            "entries": contest.entries,
+            "entry_fee": contest.entry_fee,
+        }
+
+    write_contests(contest_fields)
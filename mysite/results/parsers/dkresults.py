@@ -1,47 +1,55 @@
 import datetime
 import decimal
-import io
+import hashlib
 import logging
 import re
+import time
 import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from csv import reader
 from pathlib import Path
 
-import browsercookie
-import requests
-from bs4 import BeautifulSoup
+from django.db import transaction
+from django.utils import timezone
 
+from results import cache
+from results.analytics import LineupCollector, save_lineup_stats
+from results.contests import write_contests
+from results.lineups import save_contest_lineups
 from results.models import (
     DKContest,
-    DKContestPayout,
     DKResult,
     DKResultOwnership,
-    Player,
+    DKStandingsDownload,
+    DKStandingsIngest,
 )
+from results.parsers import client
+from results.parsers.pages import extract, has_class
+from results.parsers.streams import (
+    CHUNK_SIZE,
+    iter_hashed,
+    iter_zip_member,
+    open_text_stream,
+)
+from results.payouts import write_payouts
+from results.players import get_player_index
+from results.summary import materialize_contest_summaries
 from results.utils import get_datetime_yearless
 
 logger = logging.getLogger(__name__)
 
-STOP_WORDS = set(["PG", "SG", "SF", "PF", "C", "F", "G", "UTIL"])
+# get_contest_result_data() statuses
+DOWNLOADED = "downloaded"
+NOT_MODIFIED = "not modified"
+INGESTED = "ingested"
+EMPTY = "empty"
+
+# number of standings rows written per transaction
+BATCH_SIZE = 5000
 
 DIR = Path(__file__).parents[0]
 CSVPATH = Path(DIR, "../data/results/")
-COOKIES = browsercookie.chrome()
-HEADERS = {
-    "Accept": "*/*",
-    "Accept-Encoding": "gzip, deflate, sdch",
-    "Accept-Language": "en-US,en;q=0.8",
-    "Cache-Control": "no-cache",
-    "Connection": "keep-alive",
-    "Host": "www.draftkings.com",
-    "Pragma": "no-cache",
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_5) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/48.0.2564.97 Safari/537.36"
-    ),
-    "X-Requested-With": "XMLHttpRequest",
-}
 
 
 def dollars_to_decimal(dollarstr):
@@ -66,35 +74,51 @@ def datestr_to_date(datestr):
     return get_datetime_yearless(f"{monthstr} {day}")
 
 
-def get_contest_data(contest_id):
-    url = f"https://www.draftkings.com/contest/gamecenter/{contest_id}"
+def is_contest_header(tag, attrs):
+    return has_class(attrs, "top")
 
-    response = requests.get(url, headers=HEADERS, cookies=COOKIES)
-    soup = BeautifulSoup(response.text, "html5lib")
 
+def parse_contest_page(page):
+    """
+    Return the DKContest fields of a parsed gamecenter @page, or None if the
+    contest is still in progress. Raises IndexError if there's no contest.
+    @param page: document from pages.extract(html, is_contest_header), or
+                 a BeautifulSoup of the whole page
+    """
+    header = page.find_all(class_="top")[0].find_all("h4")
+    info_header = (
+        page.find_all(class_="top")[0]
+        .find_all(class_="info-header")[0]
+        .find_all("span")
+    )
+    completed = info_header[3].string
+    logger.debug("Positions paid: %s", int(info_header[4].string))
+    if completed.strip().upper() == "COMPLETED":
+        return {
+            "name": header[0].string,
+            "total_prizes": dollars_to_decimal(header[1].string),
+            "date": datestr_to_date(info_header[0].string),
+            "entries": int(info_header[2].string),
+            "positions_paid": int(info_header[4].string),
+        }
+    return None
+
+
+def fetch_contest_data(contest_id):
+    """
+    Return the DKContest fields scraped from the contest's gamecenter page, or
+    None if the contest is missing or still in progress.
+    """
+    url = f"https://www.draftkings.com/contest/gamecenter/{contest_id}"
+
+    response = client.get(url)
     try:
-        header = soup.find_all(class_="top")[0].find_all("h4")
-        info_header = (
-            soup.find_all(class_="top")[0]
-            .find_all(class_="info-header")[0]
-            .find_all("span")
-        )
-        completed = info_header[3].string
-        logger.debug("Positions paid: %s", int(info_header[4].string))
-        if completed.strip().upper() == "COMPLETED":
+        contest_data = parse_contest_page(extract(response.text, is_contest_header))
+        if contest_data:
             logger.debug("contest %s is completed", contest_id)
-            DKContest.objects.update_or_create(
-                dk_id=contest_id,
-                defaults={
-                    "name": header[0].string,
-                    "total_prizes": dollars_to_decimal(header[1].string),
-                    "date": datestr_to_date(info_header[0].string),
-                    "entries": int(info_header[2].string),
-                    "positions_paid": int(info_header[4].string),
-                },
-            )
-        else:
-            logger.warning("Contest %s is still in progress", contest_id)
+            return contest_data
+
+        logger.warning("Contest %s is still in progress", contest_id)
     except IndexError:
         # This error occurs for old contests whose pages no longer are
         # being served.
@@ -102,13 +126,40 @@ def get_contest_data(contest_id):
         # header = soup.find_all(class_='top')[0].find_all('h4')
         # IndexError: list index out of range
         logger.error("Couldn't find DK contest with id %s", contest_id)
+    return None
 
 
 def place_to_number(place):
     return int(re.findall(r"\d+", place)[0])
 
 
-def get_contest_prize_data(contest_id):
+def is_prize_cell(tag, attrs):
+    return tag == "h2" or attrs.get("id") == "payouts-table"
+
+
+def parse_prize_page(page):
+    """
+    Return the entry fee and the (upper rank, lower rank, payout) rows of a
+    parsed details popup @page. Raises IndexError if there's no contest.
+    @param page: document from pages.extract(html, is_prize_cell), or a
+                 BeautifulSoup of the whole page
+    """
+    payouts = page.find_all(id="payouts-table")[0].find_all("tr")
+    entry_fee = page.find_all("h2")[0].text.split("|")[2].strip()
+    payout_rows = []
+    for payout in payouts:
+        places, payout = [x.string for x in payout.find_all("td")]
+        places = [place_to_number(x.strip()) for x in places.split("-")]
+        top, bottom = (places[0], places[0]) if len(places) == 1 else places
+        payout_rows.append((top, bottom, dollars_to_decimal(payout)))
+    return dollars_to_decimal(entry_fee), payout_rows
+
+
+def fetch_contest_prize_data(contest_id):
+    """
+    Return the entry fee and the (upper rank, lower rank, payout) rows scraped
+    from the contest's details popup, or None if the contest is missing.
+    """
     url = "https://www.draftkings.com/contest/detailspop"
     params = {
         "contestId": contest_id,
@@ -116,33 +167,59 @@ def get_contest_prize_data(contest_id):
         "defaultToDetails": True,
         "layoutType": "legacy",
     }
-    response = requests.get(url, headers=HEADERS, cookies=COOKIES, params=params)
-    soup = BeautifulSoup(response.text, "html5lib")
-
+    response = client.get(url, params=params)
     try:
-        payouts = soup.find_all(id="payouts-table")[0].find_all("tr")
-        entry_fee = soup.find_all("h2")[0].text.split("|")[2].strip()
-        dkcontest = DKContest.objects.get(dk_id=contest_id)
-        dkcontest.entry_fee = dollars_to_decimal(entry_fee)
-        dkcontest.save()
-        for payout in payouts:
-            places, payout = [x.string for x in payout.find_all("td")]
-            places = [place_to_number(x.strip()) for x in places.split("-")]
-            top, bottom = (places[0], places[0]) if len(places) == 1 else places
-            DKContestPayout.objects.update_or_create(
-                contest=dkcontest,
-                upper_rank=top,
-                lower_rank=bottom,
-                defaults={"payout": dollars_to_decimal(payout)},
-            )
+        return parse_prize_page(extract(response.text, is_prize_cell))
     except IndexError as ex:
-        # See comment in get_contest_data()
+        # See comment in fetch_contest_data()
         logger.error("Couldn't find DK contest with id %s: %s", contest_id, ex)
+    return None
 
 
-def save_contest_standings_to_file(response, contest_id):
-    logger.info("Downloading file from %s", response.url)
+def fetch_contest_pages(contest_id):
+    """Return the contest data and prize data scraped from a contest's pages."""
+    return fetch_contest_data(contest_id), fetch_contest_prize_data(contest_id)
 
+
+def save_contest_pages(pages):
+    """
+    Write the scraped fields and payouts of every contest in one transaction.
+    @param pages [dict]: contest id => (contest data, prize data)
+    """
+    contest_fields = {}
+    for contest_id, (contest_data, prize_data) in pages.items():
+        fields = dict(contest_data or {})
+        if prize_data:
+            fields["entry_fee"] = prize_data[0]
+        if fields:
+            contest_fields[contest_id] = fields
+
+    with transaction.atomic():
+        contests, _ = write_contests(contest_fields)
+        for contest_id, (_, prize_data) in pages.items():
+            if prize_data:
+                write_payouts(contests[str(contest_id)], prize_data[1])
+
+    for contest_id, (_, prize_data) in pages.items():
+        if prize_data:
+            cache.bump_contest(contests[str(contest_id)].pk)
+
+
+def get_contest_pages(contest_ids, workers=1):
+    """
+    Scrape the pages of contests on @workers threads and save them in bulk.
+    Return the ids of the contests that are completed.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = dict(zip(contest_ids, executor.map(fetch_contest_pages, contest_ids)))
+    save_contest_pages(pages)
+    return {
+        contest_id for contest_id, (contest_data, _) in pages.items() if contest_data
+    }
+
+
+def is_standings_response(response):
+    """Return False if the export response doesn't contain a standings file."""
     if (
         "Content-Length" in response.headers
         and response.headers["Content-Length"] == "0"
@@ -152,55 +229,308 @@ def save_contest_standings_to_file(response, contest_id):
 
     # logger.debug("response headers: %s", response.headers)
 
-    filename = Path(CSVPATH, f"contest-standings-{contest_id}.csv")
-    if "text/html" in response.headers["Content-Type"]:
+    return "text/html" not in response.headers["Content-Type"]
+
+
+def iter_standings_content(response):
+    """Yield the standings CSV bytes from a (possibly zipped) export response."""
+    chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+    if response.headers["Content-Type"] == "text/csv":
+        return chunks
+    return iter_zip_member(chunks)
+
+
+def get_standings_filename(contest_id):
+    return Path(CSVPATH, f"contest-standings-{contest_id}.csv")
+
+
+def get_standings_downloads(contest_ids):
+    """
+    Return contest id => DKStandingsDownload for @contest_ids, with unsaved
+    entries for contests that were never downloaded.
+    """
+    downloads = {
+        download.contest.dk_id: download
+        for download in DKStandingsDownload.objects.filter(
+            contest__dk_id__in=contest_ids
+        ).select_related("contest__standings_ingest")
+    }
+    return {
+        contest_id: downloads.get(str(contest_id), DKStandingsDownload())
+        for contest_id in contest_ids
+    }
+
+
+def is_ingested(download):
+    """
+    Return True if @download is the final standings of a completed contest
+    and it has been completely loaded into the database.
+    """
+    if download.pk is None or not download.contest_completed:
         return False
-    elif response.headers["Content-Type"] == "text/csv":
-        with open(filename, "w", newline="") as file:
-            file.writelines(response.content.decode("utf-8"))
-        return True
-    else:
-        zfile = zipfile.ZipFile(io.BytesIO(response.content))
-        for name in zfile.namelist():
-            zfile.extract(name, CSVPATH)
-        return True
-        # with open(OUTFILE, "wb") as f:
-        #     for chunk in response.iter_content(chunk_size=1024):
-        #         if chunk:
-        #             f.write(chunk)
-
-
-def get_contest_result_data(contest_id):
-    url = f"https://www.draftkings.com/contest/gamecenter/{contest_id}"
-    # update referer
-    # HEADERS["Referer"] = url
+    try:
+        ingest = download.contest.standings_ingest
+    except DKStandingsIngest.DoesNotExist:
+        return False
+    return ingest.completed and ingest.file_hash == download.content_hash
+
+
+def get_conditional_headers(download):
+    headers = {}
+    if download.etag:
+        headers["If-None-Match"] = download.etag
+    if download.last_modified:
+        headers["If-Modified-Since"] = download.last_modified
+    return headers
+
+
+def skip_download(download, status, completed):
+    """Account for a standings download that wasn't needed."""
+    download.bytes_saved += download.size
+    download.contest_completed = download.contest_completed or completed
+    return status
+
+
+def update_download(download, response, content_hash, completed):
+    """Update @download from a full standings download."""
+    download.etag = response.headers.get("ETag")
+    download.last_modified = response.headers.get("Last-Modified")
+    download.content_hash = content_hash
+    download.size = int(response.headers.get("Content-Length", response.raw.tell()))
+    download.contest_completed = completed
+    download.downloaded_at = timezone.now()
+
+
+def save_standings_download(contest_id, download):
+    if download.contest_id is None:
+        download.contest, _ = DKContest.objects.get_or_create(dk_id=contest_id)
+    download.save()
+
+
+def log_download_stats(statuses, downloads):
+    counts = Counter(statuses.values())
+    saved = sum(
+        downloads[contest_id].size
+        for contest_id, status in statuses.items()
+        if status in (NOT_MODIFIED, INGESTED)
+    )
+    logger.info(
+        "Standings: %d downloaded, %d not modified, %d already ingested, "
+        "%.1f MB saved",
+        counts[DOWNLOADED],
+        counts[NOT_MODIFIED],
+        counts[INGESTED],
+        saved / 1024 / 1024,
+    )
+
+
+def save_contest_standings_to_file(response, contest_id):
+    """Write the standings CSV to disk and return its hash, or None if empty."""
+    logger.info("Downloading file from %s", response.url)
+
+    if not is_standings_response(response):
+        return None
+
+    # data/results/ isn't part of the repository
+    CSVPATH.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    with open(get_standings_filename(contest_id), "wb") as file:
+        for chunk in iter_hashed(iter_standings_content(response), digest):
+            file.write(chunk)
+    return digest.hexdigest()
+
+
+def get_contest_standings_response(contest_id, headers=None):
+    url = f"https://www.draftkings.com/contest/exportfullstandingscsv/{contest_id}"
+    return client.get(url, stream=True, headers=headers)
+
+
+def get_contest_result_data(contest_id, download=None, completed=False):
+    """
+    Download the standings file to CSVPATH unless the completed contest is
+    already ingested or the server says the local copy is still current.
+    Updates (without saving) the @download cache entry and returns one of
+    the download statuses, or None if the export couldn't be read.
+    """
+    download = download or DKStandingsDownload()
+    if is_ingested(download):
+        return skip_download(download, INGESTED, completed)
+
+    # only ask for changes if the file from the last download is still here
+    headers = None
+    filename = get_standings_filename(contest_id)
+    if download.content_hash and filename.exists():
+        if hash_file(filename) == download.content_hash:
+            headers = get_conditional_headers(download)
 
     try:
-        export_url = url.replace("gamecenter", "exportfullstandingscsv")
-        response = requests.get(export_url, cookies=COOKIES)
-        return save_contest_standings_to_file(response, contest_id)
+        with get_contest_standings_response(contest_id, headers) as response:
+            if response.status_code == 304:
+                return skip_download(download, NOT_MODIFIED, completed)
+            content_hash = save_contest_standings_to_file(response, contest_id)
+            if content_hash is None:
+                return EMPTY
+            update_download(download, response, content_hash, completed)
+            return DOWNLOADED
+    except zipfile.BadZipfile:
+        logger.error("Couldn't download/extract CSV zip for %s", contest_id)
+    return None
 
-        # unzip_data()
+
+def stream_contest_result_data(sport, contest_id, download=None, completed=False):
+    """
+    Parse the standings export straight from the HTTP response, without
+    buffering the download or writing it to disk first. Updates (without
+    saving) the @download cache entry and returns one of the download
+    statuses, or None if the export couldn't be read.
+    """
+    download = download or DKStandingsDownload()
+    if is_ingested(download):
+        return skip_download(download, INGESTED, completed)
+
+    # only ask for changes if the last download is completely ingested
+    headers = None
+    if download.pk and download.content_hash:
+        ingest = DKStandingsIngest.objects.filter(contest_id=download.contest_id)
+        if ingest.filter(completed=True, file_hash=download.content_hash).exists():
+            headers = get_conditional_headers(download)
+
+    try:
+        with get_contest_standings_response(contest_id, headers) as response:
+            if response.status_code == 304:
+                return skip_download(download, NOT_MODIFIED, completed)
+            logger.info("Streaming file from %s", response.url)
+            if not is_standings_response(response):
+                return EMPTY
+            digest = hashlib.sha256()
+            content = iter_hashed(iter_standings_content(response), digest)
+            with open_text_stream(content) as file:
+                ingest = parse_contest_result_rows(sport, contest_id, reader(file))
+            # the hash is only known once the whole stream has been read
+            ingest.file_hash = digest.hexdigest()
+            ingest.save()
+            update_download(download, response, ingest.file_hash, completed)
+            return DOWNLOADED
     except zipfile.BadZipfile:
         logger.error("Couldn't download/extract CSV zip for %s", contest_id)
+    return None
 
 
 def parse_entry_name(entry_name):
     return entry_name.split()[0]
 
 
-def get_player_cached(name, player_cache):
-    if name in player_cache:
-        result = player_cache[name]
-        return result
-    return Player.get_by_name(name)
+def write_ownership(contest, ownership):
+    """
+    Upsert DKResultOwnership rows for a contest in bulk.
+    @param ownership [dict]: player id => (ownership, fpts)
+    """
+    existing = {o.player_id: o for o in contest.ownership.all()}
+    to_create = []
+    to_update = []
+    for player_id, (value, fpts) in ownership.items():
+        if player_id in existing:
+            row = existing[player_id]
+            row.ownership = value
+            row.fpts = fpts
+            to_update.append(row)
+        else:
+            to_create.append(
+                DKResultOwnership(
+                    contest=contest, player_id=player_id, ownership=value, fpts=fpts
+                )
+            )
+    DKResultOwnership.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    DKResultOwnership.objects.bulk_update(
+        to_update, ["ownership", "fpts"], batch_size=BATCH_SIZE
+    )
 
 
-def parse_contest_result_csv(sport, contest_id):
-    # player_cache = {p.full_name: p for p in Player.objects.all() if p.full_name}
-    player_cache = {
-        p.name: p for p in Player.objects.filter(sport__exact=sport) if p.name
-    }
+def write_results(contest, results):
+    """
+    Upsert DKResult rows for a contest in bulk.
+    @param results [dict]: entry id => (name, rank, points)
+    """
+    existing = {r.dk_id: r for r in DKResult.objects.filter(dk_id__in=list(results))}
+    to_create = []
+    to_update = []
+    for entry_id, (name, rank, points) in results.items():
+        if entry_id in existing:
+            row = existing[entry_id]
+            row.contest = contest
+            row.name = name
+            row.rank = rank
+            row.points = points
+            to_update.append(row)
+        else:
+            to_create.append(
+                DKResult(
+                    contest=contest, dk_id=entry_id, name=name, rank=rank, points=points
+                )
+            )
+    DKResult.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    DKResult.objects.bulk_update(
+        to_update, ["contest", "name", "rank", "points"], batch_size=BATCH_SIZE
+    )
+
+
+def flush_standings(contest, ownership, results, ingest=None, offset=0):
+    """
+    Write pending ownership and result rows in a single transaction, along
+    with the @ingest checkpoint at standings row @offset.
+    """
+    if not ownership and not results and ingest is None:
+        return
+
+    with transaction.atomic():
+        if ownership:
+            write_ownership(contest, ownership)
+        if results:
+            write_results(contest, results)
+        if ingest is not None:
+            ingest.last_offset = offset
+            ingest.rows_processed = offset
+            ingest.save()
+    if ownership or results:
+        cache.bump_contest(contest.pk)
+    ownership.clear()
+    results.clear()
+
+
+def hash_file(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_contest_result_rows(sport, contest_id, csvreader, file_hash=None):
+    """
+    Populate the database from an iterable of standings rows, skipping files
+    that were already ingested (by @file_hash) and resuming after the last
+    committed row of a partial ingest of the same file. Streamed files (with
+    no @file_hash) are always parsed from the start.
+    @return: the DKStandingsIngest, or None if the file was already ingested
+    """
+    contest, _ = DKContest.objects.get_or_create(dk_id=contest_id)
+    ingest, _ = DKStandingsIngest.objects.get_or_create(contest=contest)
+    same_file = file_hash is not None and ingest.file_hash == file_hash
+    if ingest.completed and same_file:
+        logger.info("Standings for %s were already ingested, skipping", contest_id)
+        return None
+    if ingest.completed or not same_file:
+        # start over on a new file, or on a streamed one since there's no
+        # telling whether it's the file the checkpoint was made on
+        ingest.last_offset = 0
+        ingest.completed = False
+    ingest.file_hash = file_hash
+    resume = ingest.last_offset
+    if resume:
+        logger.info("Resuming standings for %s after row %d", contest_id, resume)
+
+    player_index = get_player_index(sport)
+    lineups = LineupCollector(sport, player_index)
 
     vips = [
         "aplewandowski",
@@ -213,90 +543,163 @@ def parse_contest_result_csv(sport, contest_id):
         "ChipotleAddict",
     ]
 
-    contest, _ = DKContest.objects.get_or_create(dk_id=contest_id)
-    filename = CSVPATH / f"contest-standings-{contest_id}.csv"
+    # pending rows, deduped on (contest, player) and entry id respectively
+    ownership = {}
+    results = {}
+    start = time.perf_counter()
+    count = 0
+    for i, row in enumerate(csvreader):
+        # Rank, EntryId, EntryName, TimeRemaining, Points, Lineup
+        # (row 0 is the header, rows up to resume are already committed but
+        # still count for the lineup analytics)
+        if i != 0 and row[0]:
+            rank, entry_id, entry_name, _, points, lineup = row[:6]
+            lineups.add(
+                int(entry_id),
+                parse_entry_name(entry_name),
+                int(rank),
+                float(points),
+                lineup,
+            )
+        if i > resume:
+            rank, entry_id, entry_name, _, points, _ = row[:6]
+            if entry_name in vips:
+                results[entry_id] = (
+                    parse_entry_name(entry_name),
+                    int(rank),
+                    float(points),
+                )
+
+            # grab ownership stats for players
+            player_stats = row[7:]
+            # skip if empty
+            # (sometimes happens on the player columns in the standings)
+            if player_stats and not all(s == "" or s.isspace() for s in player_stats):
+                name, pos, value, fpts = player_stats
+
+                player = player_index.get(name)
+                ownership[player.pk] = (float(value.strip("%")) / 100, fpts)
+
+            if i % BATCH_SIZE == 0:
+                flush_standings(contest, ownership, results, ingest, i)
+                logger.info("%d DKResult records created", i)
+        count = i
+    ingest.completed = True
+    flush_standings(contest, ownership, results, ingest, count)
+    if lineups:
+        save_contest_lineups(contest, lineups.get_lineups())
+        save_lineup_stats(contest, lineups.get_stats())
+        cache.bump_contest(contest.pk)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "%d DKResult records created in %.2fs (%.0f rows/sec)",
+        count,
+        elapsed,
+        count / elapsed if elapsed else 0,
+    )
+    return ingest
+
+
+def parse_contest_result_csv(sport, contest_id):
+    """Parse the saved standings file, returning True if any rows were written."""
+    filename = get_standings_filename(contest_id)
     try:
-        with open(filename, "r", encoding="utf8") as file:
-            csvreader = reader(file)
-            count = 0
-            for i, row in enumerate(csvreader):
-                # Rank, EntryId, EntryName, TimeRemaining, Points, Lineup
-                if i != 0:
-                    # rank, entry_id, entry_name, _, points, lineup = row
-                    rank, entry_id, entry_name, _, points, lineup = row[:6]
-                    # lineup = lineup.split()
-                    # for wordidx, word in enumerate(lineup[:]):
-                    #     if word in STOP_WORDS:
-                    #         lineup[wordidx] = "\t"
-                    # word_list = " ".join(lineup).split("\t")
-                    # players = []
-                    # for word in " ".join(lineup).split("\t"):
-                    #     if word.strip():
-                    #         get_player_cached(word.strip(), player_cache)
-                    # players = [
-                    #     get_player_cached(word.strip(), player_cache)
-                    #     for word in " ".join(lineup).split("\t")
-                    #     if word.strip()
-                    # ]
-                    # if players:
-                    if entry_name in vips:
-                        DKResult.objects.update_or_create(
-                            dk_id=entry_id,
-                            defaults={
-                                "contest": contest,
-                                "name": parse_entry_name(entry_name),
-                                "rank": rank,
-                                "points": points,
-                                # "pg": players[0],
-                                # "sg": players[1],
-                                # "sf": players[2],
-                                # "pf": players[3],
-                                # "c": players[4],
-                                # "g": players[5],
-                                # "f": players[6],
-                                # "util": players[7],
-                            },
-                        )
-
-                    # grab ownership stats for players
-                    player_stats = row[7:]
-                    if player_stats:
-                        # continue if empty
-                        # (sometimes happens on the player columns in the standings)
-                        if all(s == "" or s.isspace() for s in player_stats):
-                            continue
-
-                        name, pos, ownership, fpts = player_stats
-
-                        player = get_player_cached(name, player_cache)
-                        ownership = float(ownership.strip("%")) / 100
-
-                        DKResultOwnership.objects.update_or_create(
-                            contest=contest,
-                            player=player,
-                            defaults={"ownership": ownership, "fpts": fpts},
-                        )
-
-                    if i % 5000 == 0:
-                        logger.info("%d DKResult records created", i)
-                count = i
-            logger.info("%d DKResult records created", count)
+        file_hash = hash_file(filename)
+        with open(filename, "r", encoding="utf8", newline="") as file:
+            ingest = parse_contest_result_rows(
+                sport, contest_id, reader(file), file_hash
+            )
     except IOError:
         logger.error("Couldn't find CSV results file %s", filename)
+        return False
+    return ingest is not None
 
 
-def run(sport, contest_ids, contest=True, resultscsv=True, resultsparse=True):
+def run_concurrent(sport, contest_ids, completed, resultsparse, workers):
     """
-    Downloads and unzips the CSV results and then populates the database
+    Download standings on a pool of @workers threads while the calling thread
+    writes each contest to the database as soon as its download finishes.
+    Returns the ids of the contests whose standings were written.
     """
-
+    downloads = get_standings_downloads(contest_ids)
+    statuses = {}
+    ingested = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                get_contest_result_data,
+                contest_id,
+                downloads[contest_id],
+                contest_id in completed,
+            ): contest_id
+            for contest_id in contest_ids
+        }
+        for future in as_completed(futures):
+            contest_id = futures[future]
+            status = statuses[contest_id] = future.result()
+            save_standings_download(contest_id, downloads[contest_id])
+            # nothing to parse for an empty export or an ingested contest
+            if status in (EMPTY, INGESTED):
+                continue
+            if resultsparse and parse_contest_result_csv(sport, contest_id):
+                ingested.add(contest_id)
+    log_download_stats(statuses, downloads)
+    return ingested
+
+
+def run(
+    sport,
+    contest_ids,
+    contest=True,
+    resultscsv=True,
+    resultsparse=True,
+    workers=1,
+    stream=True,
+):
+    """
+    Downloads and unzips the CSV results and then populates the database.
+    Returns the ids of the contests whose pages say they're completed.
+    @param stream: parse each export as it downloads instead of saving it
+        first. A streamed export can't be matched to an interrupted ingest,
+        so it's always parsed from the start; saved exports (always with
+        @workers > 1) resume after the last committed row.
+    """
+    # with contest=False there's no telling whether a contest is over
+    completed = set()
+    if contest:
+        completed = get_contest_pages(contest_ids, workers)
+
+    if resultscsv and workers > 1:
+        ingested = run_concurrent(sport, contest_ids, completed, resultsparse, workers)
+        # only contests with new standings need their summaries rebuilt
+        materialize_contest_summaries(DKContest.objects.filter(dk_id__in=ingested))
+        return completed
+
+    downloads = get_standings_downloads(contest_ids) if resultscsv else {}
+    statuses = {}
+    ingested = set()
     for contest_id in contest_ids:
-        if contest:
-            get_contest_data(contest_id)
-            get_contest_prize_data(contest_id)
+        if resultscsv and resultsparse and stream:
+            # parse the export as it downloads instead of saving it first
+            statuses[contest_id] = stream_contest_result_data(
+                sport, contest_id, downloads[contest_id], contest_id in completed
+            )
+            save_standings_download(contest_id, downloads[contest_id])
+            if statuses[contest_id] == DOWNLOADED:
+                ingested.add(contest_id)
+            continue
         if resultscsv:
-            # get_contest_result_data returns false if empty
-            if get_contest_result_data(contest_id) is False:
+            statuses[contest_id] = get_contest_result_data(
+                contest_id, downloads[contest_id], contest_id in completed
+            )
+            save_standings_download(contest_id, downloads[contest_id])
+            # nothing to parse for an empty export or an ingested contest
+            if statuses[contest_id] in (EMPTY, INGESTED):
                 continue
-        if resultsparse:
-            parse_contest_result_csv(sport, contest_id)
+        if resultsparse and parse_contest_result_csv(sport, contest_id):
+            ingested.add(contest_id)
+    if resultscsv:
+        log_download_stats(statuses, downloads)
+    # only contests with new standings need their summaries rebuilt
+    materialize_contest_summaries(DKContest.objects.filter(dk_id__in=ingested))
+    return completed
@@ -1,40 +1,80 @@
 import csv
 import datetime
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-import browsercookie
-import requests
+from django.db import transaction
+from django.utils import timezone
 
-from results.models import DKSalary, Player
+from results import cache
+from results.models import DKContest, DKSalary, Player
+from results.parsers import client
+from results.parsers.lobby import LobbySnapshot
+from results.summary import materialize_contest_summaries
 
 logger = logging.getLogger(__name__)
 
 # CSVPATH = Path(__file__, "mysite/results/data/salaries/")
 DIR = Path(__file__).parents[0]
 CSVPATH = Path(DIR, "../data/salaries/")
-COOKIES = browsercookie.chrome()
-HEADERS = {
-    "Accept": "*/*",
-    "Accept-Encoding": "gzip, deflate, sdch",
-    "Accept-Language": "en-US,en;q=0.8",
-    "Cache-Control": "no-cache",
-    "Connection": "keep-alive",
-    "Host": "www.draftkings.com",
-    "Pragma": "no-cache",
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_5) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/48.0.2564.97 Safari/537.36"
-    ),
-    "X-Requested-With": "XMLHttpRequest",
-}
+
+
+def get_players(sport, teams):
+    """Return existing players for @sport and @teams keyed on (name, team)."""
+    players = Player.objects.filter(sport=sport, team_abbv__in=teams)
+    return {(p.name, p.team_abbv): p for p in players}
+
+
+def write_players(sport, positions):
+    """
+    Create missing players and update changed DK positions in bulk.
+    @param positions [dict]: (name, team_abbv) => position
+    @return [dict]: (name, team_abbv) => Player
+    """
+    teams = {team_abbv for _, team_abbv in positions}
+    players = get_players(sport, teams)
+
+    missing = [
+        Player(
+            name=name,
+            sport=sport,
+            team_abbv=team_abbv,
+            position=pos,
+            dk_position=pos,
+        )
+        for (name, team_abbv), pos in positions.items()
+        if (name, team_abbv) not in players
+    ]
+    if missing:
+        logger.debug("Creating %d players", len(missing))
+        Player.objects.bulk_create(missing)
+        # bulk_create doesn't set primary keys on SQLite
+        players = get_players(sport, teams)
+
+    changed = []
+    now = timezone.now()
+    for key, pos in positions.items():
+        player = players[key]
+        if player.dk_position != pos:
+            logger.debug(
+                "Updating %s position %s to %s", player.name, player.dk_position, pos
+            )
+            player.dk_position = pos
+            player.updated_at = now
+            changed.append(player)
+    Player.objects.bulk_update(changed, ["dk_position", "updated_at"])
+
+    return players
 
 
 def write_salaries_to_db(
     input_rows, sport, draft_group_id, contest_type_id, date=datetime.date.today()
 ):
     return_rows = []
+    # (name, team_abbv) => (position, salary)
+    salaries = {}
     csvreader = csv.reader(input_rows, delimiter=",", quotechar='"')
     # try:
     for i, row in enumerate(csvreader):
@@ -44,70 +84,74 @@ def write_salaries_to_db(
             )
             # trim whitespace from name
             name = name.strip(" \t\n\r")
-            # player = Player.get_by_name(name)
-            # fetch or create Player
-            player, _ = Player.objects.get_or_create(
-                name=name,
-                sport=sport,
-                team_abbv=team_abbv,
-                defaults={
-                    "sport": sport,
-                    "team_abbv": team_abbv,
-                    "position": pos,
-                    "dk_position": pos,
-                },
-            )
+            salaries.setdefault((name, team_abbv), (pos, int(salary)))
+            return_rows.append(row)
 
-            dksalary, _ = DKSalary.objects.get_or_create(
-                player=player,
-                sport=sport,
-                draft_group_id=draft_group_id,
-                defaults={
-                    "date": date,
-                    "salary": int(salary),
-                    "contest_type_id": contest_type_id,
-                },
-            )
+    with transaction.atomic():
+        players = write_players(sport, {key: pos for key, (pos, _) in salaries.items()})
+        existing = {
+            s.player_id: s
+            for s in DKSalary.objects.filter(draft_group_id=draft_group_id)
+        }
 
-            if player.dk_position != pos:
-                player.dk_position = pos
-                logger.debug(
-                    "Updating %s position %s to %s",
-                    player.name,
-                    player.dk_position,
-                    pos,
+        new_salaries = []
+        for key, (_, salary) in salaries.items():
+            player = players[key]
+            if player.pk not in existing:
+                new_salaries.append(
+                    DKSalary(
+                        player=player,
+                        sport=sport,
+                        draft_group_id=draft_group_id,
+                        date=date,
+                        salary=salary,
+                        contest_type_id=contest_type_id,
+                    )
                 )
-                player.save()
-
-            if dksalary.salary != int(salary):
+            elif existing[player.pk].salary != salary:
                 logger.warning(
                     "Warning: trying to overwrite salary (old: %s dg: %s new: %s dg: %s) for %s. "
                     "Ignoring - did not overwrite",
-                    dksalary.salary,
-                    dksalary.draft_group_id,
+                    existing[player.pk].salary,
+                    draft_group_id,
                     salary,
                     draft_group_id,
                     player.name,
                 )
-            return_rows.append(row)
+        DKSalary.objects.bulk_create(new_salaries, ignore_conflicts=True)
+    cache.bump_draft_group(draft_group_id)
+    if new_salaries:
+        # summaries of contests already fetched include the salaries
+        materialize_contest_summaries(
+            DKContest.objects.filter(draft_group_id=draft_group_id)
+        )
+
+    logger.info(
+        "Wrote %d players and %d new salaries for draft group %s",
+        len(salaries),
+        len(new_salaries),
+        draft_group_id,
+    )
     return return_rows
 
 
+def download_salary_csv(draft_group_id, contest_type_id):
+    """Return the salary CSV lines for a draft group and the download time."""
+    url = "https://www.draftkings.com/lineup/getavailableplayerscsv"
+    start = time.perf_counter()
+    response = client.get(
+        url, params={"contestTypeId": contest_type_id, "draftGroupId": draft_group_id}
+    )
+    return response.text.splitlines(), time.perf_counter() - start
+
+
 def get_salary_csv(sport, draft_group_id, contest_type_id, date):
     """
         Assume the salaries for each player in different draft groups are the
         same for any given day.
         """
-    url = "https://www.draftkings.com/lineup/getavailableplayerscsv"
-    response = requests.get(
-        url,
-        headers=HEADERS,
-        cookies=COOKIES,
-        params={"contestTypeId": contest_type_id, "draftGroupId": draft_group_id},
-    )
-    return write_salaries_to_db(
-        response.text.splitlines(), sport, draft_group_id, contest_type_id, date
-    )
+    lines, _ = download_salary_csv(draft_group_id, contest_type_id)
+    return write_salaries_to_db(lines, sport, draft_group_id, contest_type_id, date)
 
 
 def write_csv(rows, date, sport):
@@ -189,20 +233,22 @@ def get_salary_date(draft_group):
 #     return False
 
 
-def run(sport, writecsv=True):
+def run(sport, writecsv=True, workers=1, lobby=None):
     """
     Downloads and unzips the CSV salaries and then populates the database
+    @param lobby [LobbySnapshot]: fetched if not given
     """
+    if lobby is None:
+        lobby = LobbySnapshot.fetch(sport)
 
-    url = f"https://www.draftkings.com/lobby/getcontests?sport={sport}"
-    response = requests.get(url, headers=HEADERS, cookies=COOKIES).json()
     rows_by_date = {}
     # rows_by_dg = {}
-    for dg in response["DraftGroups"]:
+    draft_groups = []
+    for dg in lobby.draft_groups:
         # dg['StartDateEst'] should be mostly the same for draft groups, (might
         # not be the same for the rare long-running contest) and should be the
         # date we're looking for (game date in US time).
-        # date = get_salary_date(response["DraftGroups"])
+        # date = get_salary_date(lobby.draft_groups)
         date = get_salary_date(dg)
         tag = dg["DraftGroupTag"]
         suffix = dg["ContestStartTimeSuffix"]
@@ -231,13 +277,37 @@ def run(sport, writecsv=True):
             contest_type_id,
             suffix,
         )
-        row = get_salary_csv(sport, draft_group_id, contest_type_id, date)
-        if date not in rows_by_date:
-            rows_by_date[date] = []
-        rows_by_date[date] += row
-        # if draft_group_id not in rows_by_dg:
-        #     rows_by_dg[draft_group_id] = []
-        # rows_by_dg[draft_group_id] += row
+        draft_groups.append((draft_group_id, contest_type_id, date))
+
+    # download concurrently, but write to the database from this thread only
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(download_salary_csv, draft_group_id, contest_type_id): (
+                draft_group_id,
+                contest_type_id,
+                date,
+            )
+            for draft_group_id, contest_type_id, date in draft_groups
+        }
+        for future in as_completed(futures):
+            draft_group_id, contest_type_id, date = futures[future]
+            lines, download_time = future.result()
+            start = time.perf_counter()
+            row = write_salaries_to_db(
+                lines, sport, draft_group_id, contest_type_id, date
+            )
+            logger.info(
+                "Draft group %s: downloaded in %.2fs, written in %.2fs",
+                draft_group_id,
+                download_time,
+                time.perf_counter() - start,
+            )
+            if date not in rows_by_date:
+                rows_by_date[date] = []
+            rows_by_date[date] += row
+            # if draft_group_id not in rows_by_dg:
+            #     rows_by_dg[draft_group_id] = []
+            # rows_by_dg[draft_group_id] += row
 
     if writecsv:
         # for dg, rows in rows_by_dg.items():
@@ -0,0 +1,194 @@
+"""
+One fetch of a sport's DraftKings lobby for everything that reads it.
+
+Contest discovery reads the lobby's Contests and the salary ingest reads its
+DraftGroups from the same multi-megabyte getcontests response. A
+LobbySnapshot downloads and parses it once, so both can be handed the same
+object, and keeps the raw response on disk for LOBBY_TTL seconds so runs
+close together don't download it again.
+
+Lobbies are decoded with the fastest JSON library that's installed. msgspec
+decodes straight into dicts of only the fields the parsers read, orjson
+decodes whole responses faster than the standard library, which is the
+fallback.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from results.parsers import client
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+DIR = Path(__file__).parents[0]
+LOBBYPATH = Path(DIR, "../data/lobby/")
+# seconds a saved lobby is reused for, 0 to always download it
+LOBBY_TTL = int(os.environ.get("DK_LOBBY_TTL", 300))
+
+
+if msgspec is not None:
+    # msgspec needs Python 3.8+, like TypedDict
+    from typing import (  # pylint: disable=ungrouped-imports
+        Any,
+        Dict,
+        List,
+        Optional,
+        TypedDict,
+        Union,
+    )
+
+    # the fields of lobby contests and draft groups that are read, others are
+    # skipped while decoding
+    LobbyContest = TypedDict(
+        "LobbyContest",
+        {
+            "sd": str,
+            "n": str,
+            "id": int,
+            "dg": int,
+            "po": Union[int, float],
+            "m": int,
+            "a": Union[int, float],
+            "ec": int,
+            "mec": int,
+            "attr": Dict[str, Any],
+        },
+    )
+    LobbyDraftGroup = TypedDict(
+        "LobbyDraftGroup",
+        {
+            "DraftGroupId": int,
+            "ContestTypeId": int,
+            "DraftGroupTag": Optional[str],
+            "ContestStartTimeSuffix": Optional[str],
+            "StartDateEst": str,
+        },
+    )
+    Lobby = TypedDict(
+        "Lobby",
+        {"Contests": List[LobbyContest], "DraftGroups": List[LobbyDraftGroup]},
+        total=False,
+    )
+    LOBBY_DECODER = msgspec.json.Decoder(Union[Lobby, List[LobbyContest]])
+
+
+def decode_json(content):
+    return json.loads(content)
+
+
+def decode_orjson(content):
+    return orjson.loads(content)
+
+
+def decode_msgspec(content):
+    return LOBBY_DECODER.decode(content)
+
+
+# name => function decoding a lobby response, fastest first
+DECODERS = {}
+if msgspec is not None:
+    DECODERS["msgspec"] = decode_msgspec
+if orjson is not None:
+    DECODERS["orjson"] = decode_orjson
+DECODERS["json"] = decode_json
+# errors of responses whose fields don't have the expected types
+VALIDATION_ERRORS = (msgspec.ValidationError,) if msgspec is not None else ()
+
+
+def decode_lobby(content):
+    """
+    Decode a getcontests response with the fastest available decoder, falling
+    back to the next one if it doesn't match msgspec's lobby types.
+    """
+    for name, decode in DECODERS.items():
+        try:
+            return decode(content)
+        except VALIDATION_ERRORS as ex:
+            logger.warning("Decoding the lobby with %s failed: %s", name, ex)
+    raise Exception("no decoder could decode the lobby")
+
+
+def get_lobby_url(sport):
+    return f"https://www.draftkings.com/lobby/getcontests?sport={sport}"
+
+
+def get_lobby_filename(sport):
+    return Path(LOBBYPATH, f"lobby-{sport}.json")
+
+
+def read_cached_lobby(sport, ttl):
+    """Return the saved lobby response of @sport if it's fresh, otherwise None."""
+    filename = get_lobby_filename(sport)
+    try:
+        age = time.time() - filename.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if age > ttl:
+        return None
+
+    logger.info("Using %s lobby saved %.0fs ago", sport, age)
+    return filename.read_bytes()
+
+
+def write_cached_lobby(sport, content):
+    filename = get_lobby_filename(sport)
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    # replace the file in one step so readers never see half of it
+    partial = filename.with_suffix(".part")
+    partial.write_bytes(content)
+    os.replace(partial, filename)
+
+
+class LobbySnapshot:
+    """The Contests and DraftGroups of a sport's lobby at one point in time."""
+
+    def __init__(self, sport, response, fetched_at=None):
+        self.sport = sport
+        self.fetched_at = fetched_at or time.time()
+        if isinstance(response, list):
+            self.contests = response
+            self.draft_groups = []
+        elif "Contests" in response:
+            self.contests = response["Contests"]
+            self.draft_groups = response.get("DraftGroups", [])
+        else:
+            raise Exception("response isn't a dict or a list???")
+
+    @classmethod
+    def fetch(cls, sport, ttl=LOBBY_TTL):
+        """
+        Return the lobby of @sport, downloading it unless it was saved less
+        than @ttl seconds ago.
+        """
+        content = read_cached_lobby(sport, ttl) if ttl > 0 else None
+        if content is None:
+            url = get_lobby_url(sport)
+            logger.info("url: %s", url)
+            response = client.get(url)
+            response.raise_for_status()
+            content = response.content
+            write_cached_lobby(sport, content)
+
+        fetched_at = get_lobby_filename(sport).stat().st_mtime
+        lobby = cls(sport, decode_lobby(content), fetched_at)
+        logger.info("%s", lobby)
+        return lobby
+
+    def __str__(self):
+        return (
+            f"{self.sport} lobby: {len(self.contests)} contests, "
+            f"{len(self.draft_groups)} draft groups"
+        )
@@ -0,0 +1,139 @@
+"""
+Targeted extraction of the few elements the parsers read from DraftKings pages.
+
+Building a full html5lib tree of a page to read a handful of h4/span/td cells
+is slow, so extract() runs the standard library's tokenizer over the page and
+only builds nodes for the subtrees of the elements it's asked for. Nodes
+support the small part of the BeautifulSoup API the parsers use (find_all,
+.string and .text) with the same results, so parsing code works on either.
+"""
+from html.parser import HTMLParser
+
+# elements that have no content or end tag
+VOID_ELEMENTS = set(
+    [
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    ]
+)
+# open elements implicitly closed by the start of an element
+IMPLIED_END_TAGS = {
+    "td": set(["td", "th"]),
+    "th": set(["td", "th"]),
+    "tr": set(["tr", "td", "th"]),
+    "li": set(["li"]),
+    "option": set(["option"]),
+    "p": set(["p"]),
+}
+
+
+def has_class(attrs, name):
+    return name in (attrs.get("class") or "").split()
+
+
+class Node:
+    """An element and its children (Nodes and strings)."""
+
+    __slots__ = ("tag", "attrs", "children")
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+
+    def iter_descendants(self):
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.iter_descendants()
+
+    def find_all(self, name=None, class_=None, id=None):
+        # pylint: disable=redefined-builtin
+        return [
+            node
+            for node in self.iter_descendants()
+            if (name is None or node.tag == name)
+            and (class_ is None or has_class(node.attrs, class_))
+            and (id is None or node.attrs.get("id") == id)
+        ]
+
+    @property
+    def string(self):
+        """The only string in this element (like BeautifulSoup), or None."""
+        if len(self.children) != 1:
+            return None
+        child = self.children[0]
+        return child if isinstance(child, str) else child.string
+
+    @property
+    def text(self):
+        return "".join(
+            child if isinstance(child, str) else child.text for child in self.children
+        )
+
+
+class Extractor(HTMLParser):
+    """Collect the subtrees of elements for which match(tag, attrs) is True."""
+
+    def __init__(self, match):
+        super().__init__(convert_charrefs=True)
+        self.match = match
+        # holds the outermost matching elements in document order
+        self.document = Node(None, {})
+        self.stack = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if not self.stack and not self.match(tag, attrs):
+            return
+
+        implied = IMPLIED_END_TAGS.get(tag, ())
+        while len(self.stack) > 1 and self.stack[-1].tag in implied:
+            self.stack.pop()
+        node = Node(tag, attrs)
+        parent = self.stack[-1] if self.stack else self.document
+        parent.children.append(node)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(node)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        if not self.stack:
+            return
+        children = self.stack[-1].children
+        if children and isinstance(children[-1], str):
+            children[-1] += data
+        else:
+            children.append(data)
+
+    def error(self, message):
+        # only called by older versions of HTMLParser
+        pass
+
+
+def extract(html, match):
+    """
+    Return a document Node holding the elements of @html for which
+    match(tag, attrs) is True, with their descendants.
+    """
+    extractor = Extractor(match)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.document
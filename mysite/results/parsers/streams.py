@@ -0,0 +1,110 @@
+"""
+Helpers for consuming large downloads chunk by chunk instead of reading the
+whole response body into memory.
+"""
+import io
+import struct
+import zipfile
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+
+# zip local file header (see section 4.3.7 of the PKWARE APPNOTE)
+LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+# general purpose flag: sizes and crc are stored after the data
+FLAG_DATA_DESCRIPTOR = 0x08
+
+
+class IterStream(io.RawIOBase):
+    """Read-only file object on top of an iterable of byte chunks."""
+
+    def __init__(self, chunks):
+        super().__init__()
+        self.chunks = iter(chunks)
+        self.leftover = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            chunk = self.leftover or next(self.chunks)
+        except StopIteration:
+            return 0
+        size = len(buffer)
+        output, self.leftover = chunk[:size], chunk[size:]
+        buffer[: len(output)] = output
+        return len(output)
+
+
+def iter_hashed(chunks, digest):
+    """Pass @chunks through, updating the hashlib object @digest with each."""
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+
+def open_text_stream(chunks, encoding="utf8"):
+    """Wrap an iterable of byte chunks in a text file object for csv.reader."""
+    return io.TextIOWrapper(
+        io.BufferedReader(IterStream(chunks), CHUNK_SIZE),
+        encoding=encoding,
+        newline="",
+    )
+
+
+def iter_zip_member(chunks):
+    """
+    Yield the decompressed bytes of the first member of a zip archive as it
+    is read from @chunks, without seeking back to the central directory.
+    """
+    stream = io.BufferedReader(IterStream(chunks), CHUNK_SIZE)
+    header = stream.read(LOCAL_HEADER.size)
+    if len(header) < LOCAL_HEADER.size:
+        raise zipfile.BadZipfile("Truncated zip local file header")
+
+    (
+        signature,
+        _version,
+        flags,
+        method,
+        _mtime,
+        _mdate,
+        crc,
+        compressed_size,
+        _size,
+        name_length,
+        extra_length,
+    ) = LOCAL_HEADER.unpack(header)
+    if signature != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipfile("File is not a zip file")
+    stream.read(name_length + extra_length)
+
+    checksum = 0
+    if method == zipfile.ZIP_STORED:
+        if flags & FLAG_DATA_DESCRIPTOR:
+            raise zipfile.BadZipfile("Stored zip member has no size in its header")
+        remaining = compressed_size
+        while remaining:
+            data = stream.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                raise zipfile.BadZipfile("Truncated zip member")
+            remaining -= len(data)
+            checksum = zlib.crc32(data, checksum)
+            yield data
+    elif method == zipfile.ZIP_DEFLATED:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        while not decompressor.eof:
+            data = stream.read1(CHUNK_SIZE)
+            if not data:
+                raise zipfile.BadZipfile("Truncated zip member")
+            output = decompressor.decompress(data)
+            if output:
+                checksum = zlib.crc32(output, checksum)
+                yield output
+    else:
+        raise zipfile.BadZipfile(f"Unsupported zip compression method {method}")
+
+    if not flags & FLAG_DATA_DESCRIPTOR and checksum != crc:
+        raise zipfile.BadZipfile("Bad CRC-32 for zip member")
@@ -0,0 +1,140 @@
+"""
+Payout lookups for contests.
+
+A PayoutTable holds a contest's DKContestPayout rank ranges as sorted arrays,
+so the prize of a rank is a bisect away and the prizes of every entry in a
+contest are assigned with one searchsorted call. Entries tied on a rank split
+the prizes of the positions they cover, like DraftKings does.
+"""
+import bisect
+import logging
+from collections import namedtuple
+
+import numpy as np
+from django.db import transaction
+
+from results.models import DKContestPayout
+
+logger = logging.getLogger(__name__)
+
+UserROI = namedtuple("UserROI", ["name", "entries", "fees", "winnings", "roi"])
+
+
+class PayoutTable:
+    """The (upper rank, lower rank, payout) ranges of a contest."""
+
+    def __init__(self, rows):
+        rows = sorted(
+            (int(top), int(bottom), float(payout)) for top, bottom, payout in rows
+        )
+        self.upper_ranks = np.array([row[0] for row in rows], dtype=np.int64)
+        self.lower_ranks = np.array([row[1] for row in rows], dtype=np.int64)
+        self.payouts = np.array([row[2] for row in rows], dtype=np.float64)
+
+    @classmethod
+    def for_contest(cls, contest):
+        return cls(
+            contest.payouts.filter(
+                upper_rank__isnull=False, lower_rank__isnull=False
+            ).values_list("upper_rank", "lower_rank", "payout")
+        )
+
+    def __len__(self):
+        return len(self.payouts)
+
+    @property
+    def paid_ranks(self):
+        """Return the last paid rank, or 0 if nothing is paid."""
+        return int(self.lower_ranks.max()) if len(self) else 0
+
+    def get(self, rank):
+        """Return the prize for finishing alone at @rank."""
+        i = bisect.bisect_right(self.upper_ranks, rank) - 1
+        if i >= 0 and rank <= self.lower_ranks[i]:
+            return float(self.payouts[i])
+        return 0.0
+
+    def get_position_payouts(self, positions):
+        """Return the prizes of finishing positions 1 to @positions."""
+        ranks = np.arange(1, positions + 1)
+        i = np.searchsorted(self.upper_ranks, ranks, side="right") - 1
+        paid = i >= 0
+        paid[paid] &= ranks[paid] <= self.lower_ranks[i[paid]]
+        return np.where(paid, self.payouts[np.maximum(i, 0)], 0.0)
+
+    def assign(self, ranks):
+        """
+        Return the winnings of entries finishing at @ranks, splitting the
+        prizes of the positions covered by tied entries.
+        """
+        ranks = np.asarray(ranks, dtype=np.int64)
+        if not len(ranks) or not len(self):
+            return np.zeros(len(ranks))
+
+        # tied entries at rank r cover positions r to r + ties - 1
+        _, inverse, ties = np.unique(ranks, return_inverse=True, return_counts=True)
+        ties = ties[inverse.ravel()]
+        last = ranks + ties - 1
+        # cumulative prizes of positions, with position 0 paying nothing
+        cumulative = np.concatenate(
+            ([0.0], np.cumsum(self.get_position_payouts(int(last.max()))))
+        )
+        return (cumulative[last] - cumulative[ranks - 1]) / ties
+
+
+def get_user_roi(contest_lineups, payout_table, entry_fee):
+    """
+    Return UserROI for each entry name of a contest's ContestLineups, most
+    winnings first.
+    """
+    winnings = payout_table.assign(contest_lineups.ranks)
+    names, inverse = np.unique(contest_lineups.names, return_inverse=True)
+    inverse = inverse.ravel()
+    entries = np.bincount(inverse, minlength=len(names))
+    totals = np.bincount(inverse, weights=winnings, minlength=len(names))
+    fees = entries * (entry_fee or 0)
+    order = np.argsort(-totals, kind="stable")
+    return [
+        UserROI(name, count, fee, won, (won - fee) / fee if fee else None)
+        for name, count, fee, won in zip(
+            names[order].tolist(),
+            entries[order].tolist(),
+            fees[order].tolist(),
+            totals[order].tolist(),
+        )
+    ]
+
+
+def write_payouts(contest, rows):
+    """
+    Replace the payout table of @contest with the (upper rank, lower rank,
+    payout) @rows in bulk.
+    """
+    with transaction.atomic():
+        existing = {
+            (payout.upper_rank, payout.lower_rank): payout
+            for payout in DKContestPayout.objects.filter(contest=contest)
+        }
+        new_payouts = []
+        changed = []
+        for top, bottom, amount in rows:
+            payout = existing.pop((top, bottom), None)
+            if payout is None:
+                new_payouts.append(
+                    DKContestPayout(
+                        contest=contest,
+                        upper_rank=top,
+                        lower_rank=bottom,
+                        payout=amount,
+                    )
+                )
+            elif payout.payout != amount:
+                payout.payout = amount
+                changed.append(payout)
+        DKContestPayout.objects.bulk_create(new_payouts)
+        DKContestPayout.objects.bulk_update(changed, ["payout"])
+        # ranges that are no longer in the table
+        if existing:
+            DKContestPayout.objects.filter(
+                pk__in=[payout.pk for payout in existing.values()]
+            ).delete()
@@ -0,0 +1,146 @@
+import logging
+import re
+from collections import defaultdict
+
+from results.models import Player
+
+logger = logging.getLogger(__name__)
+
+SUFFIXES = set(["jr", "sr", "ii", "iii", "iv", "v"])
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_name(name):
+    """Case-fold a name and strip accents, punctuation and name suffixes."""
+    words = PUNCTUATION.sub("", Player.strip_accents(name).casefold()).split()
+    while len(words) > 1 and words[-1] in SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def get_trigrams(name):
+    """Return the set of three-letter substrings of a padded name."""
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerNameIndex:
+    """
+    In-memory replacement for Player.get_by_name over all players of a sport.
+
+    Lookups try the exact name, then the case-folded name, the accent-stripped
+    name and the normalized name (see normalize_name), and finally fall back to
+    a unique substring or trigram similarity match. When several players share
+    a name, the most recently created one wins.
+    """
+
+    # minimum trigram (Jaccard) similarity for a fuzzy match
+    FUZZY_THRESHOLD = 0.6
+
+    def __init__(self, players=()):
+        # highest Player pk added, see get_player_index()
+        self.last_pk = 0
+        self.exact = {}
+        self.folded = {}
+        self.stripped = {}
+        self.normalized = {}
+        self.trigrams = defaultdict(set)
+        for player in players:
+            self.add(player)
+
+    @classmethod
+    def for_sport(cls, sport):
+        players = Player.objects.filter(sport__exact=sport).order_by("pk")
+        return cls(p for p in players if p.name)
+
+    def __len__(self):
+        return len(self.normalized)
+
+    def add(self, player):
+        name = player.name
+        self.last_pk = max(self.last_pk, player.pk or 0)
+        normalized = normalize_name(name)
+        self.exact[name] = player
+        self.folded[name.casefold()] = player
+        self.stripped[Player.strip_accents(name).casefold()] = player
+        self.normalized[normalized] = player
+        for trigram in get_trigrams(normalized):
+            self.trigrams[trigram].add(normalized)
+
+    def get(self, name):
+        """
+        Return the Player for @name. Raises Player.DoesNotExist if no player
+        matches and Player.MultipleObjectsReturned if several players match
+        the fuzzy lookup equally well.
+        """
+        if name in self.exact:
+            return self.exact[name]
+
+        player = (
+            self.folded.get(name.casefold())
+            or self.stripped.get(Player.strip_accents(name).casefold())
+            or self.normalized.get(normalize_name(name))
+        )
+        if player is None:
+            # not remembered, a player added later may be the right match
+            return self.get_fuzzy(name)
+
+        # remember the resolved name so repeated misses are a single lookup
+        self.exact[name] = player
+        return player
+
+    def get_fuzzy(self, name):
+        """
+        Return the only player whose name contains @name, like the
+        name__contains lookup, or else the only one similar enough by trigram
+        overlap.
+        """
+        normalized = normalize_name(name)
+        if not normalized:
+            raise Player.DoesNotExist(f"No player found for name {name}")
+
+        query = get_trigrams(normalized)
+        overlap = defaultdict(int)
+        for trigram in query:
+            for candidate in self.trigrams.get(trigram, ()):
+                overlap[candidate] += 1
+
+        matches = [candidate for candidate in overlap if normalized in candidate]
+        if not matches:
+            matches = [
+                candidate
+                for candidate, shared in overlap.items()
+                if shared / (len(query) + len(get_trigrams(candidate)) - shared)
+                >= self.FUZZY_THRESHOLD
+            ]
+
+        if not matches:
+            raise Player.DoesNotExist(f"No player found for name {name}")
+        if len(matches) > 1:
+            raise Player.MultipleObjectsReturned(
+                f"Players {sorted(matches)} all match name {name}"
+            )
+
+        logger.debug("Fuzzy matched %s to %s", name, matches[0])
+        return self.normalized[matches[0]]
+
+
+# sport => PlayerNameIndex kept between contests
+INDEXES = {}
+
+
+def get_player_index(sport):
+    """
+    Return the PlayerNameIndex of @sport, building it on first use and only
+    adding the players created since on later calls.
+    """
+    index = INDEXES.get(sport)
+    if index is None:
+        index = INDEXES[sport] = PlayerNameIndex.for_sport(sport)
+        return index
+
+    players = Player.objects.filter(sport__exact=sport, pk__gt=index.last_pk)
+    for player in players.order_by("pk"):
+        if player.name:
+            index.add(player)
+    return index
@@ -0,0 +1,115 @@
+"""
+Per-contest summaries for the results pages.
+
+materialize_contest_summaries() aggregates a contest's results, ownership,
+payouts, salaries and stored lineups into its DKContestSummary, so that the
+index and detail pages read one precomputed row instead of joining and
+sorting the raw tables on every request.
+"""
+import json
+import logging
+
+import numpy as np
+from django.core.serializers.json import DjangoJSONEncoder
+
+from results import cache
+from results.lineups import load_contest_lineups
+from results.models import DKContestSummary, DKSalary
+from results.payouts import PayoutTable
+
+logger = logging.getLogger(__name__)
+
+# most owned players kept in DKContestSummary.chalk
+CHALK_PLAYERS = 5
+
+
+def get_salaries(draft_group_id):
+    """Return player id => salary and player name => salary for a draft group."""
+    salary_by_id = {}
+    salary_by_name = {}
+    salaries = DKSalary.objects.filter(draft_group_id__exact=draft_group_id)
+    for player_id, name, value in salaries.values_list(
+        "player_id", "player__name", "salary"
+    ):
+        salary_by_id[player_id] = value
+        salary_by_name[name] = value
+    return salary_by_id, salary_by_name
+
+
+def get_ownership_rows(contest, salary_by_id, salary_by_name):
+    rows = []
+    ownership = contest.ownership.select_related("player").order_by("-ownership")
+    for row in ownership:
+        rows.append(
+            {
+                "player_id": row.player_id,
+                "name": row.player.name,
+                "position": row.player.position,
+                # standings players can resolve to another Player row with the
+                # same name (e.g. after a trade), so fall back to the name
+                "salary": salary_by_id.get(
+                    row.player_id, salary_by_name.get(row.player.name, 0)
+                ),
+                "ownership": row.ownership,
+                "fpts": row.fpts,
+            }
+        )
+    return rows
+
+
+def build_contest_summary(contest):
+    """Return an unsaved DKContestSummary for @contest."""
+    results = list(contest.results.order_by("rank").values("name", "rank", "points"))
+    salary_by_id, salary_by_name = get_salaries(contest.draft_group_id)
+    ownership = get_ownership_rows(contest, salary_by_id, salary_by_name)
+    chalk = ownership[:CHALK_PLAYERS]
+    cash_rank = PayoutTable.for_contest(contest).paid_ranks or contest.positions_paid
+
+    summary = DKContestSummary(
+        contest=contest,
+        num_results=len(results),
+        cash_rank=cash_rank,
+        chalk=json.dumps([[r["name"], r["ownership"]] for r in chalk]),
+        ownership=json.dumps(ownership, cls=DjangoJSONEncoder),
+        results=json.dumps(results, cls=DjangoJSONEncoder),
+    )
+    if results:
+        summary.top_score = max(r["points"] for r in results)
+    if ownership:
+        summary.salary_weighted_ownership = sum(
+            r["ownership"] * r["salary"] for r in ownership
+        )
+
+    # every entry's lineup, when the standings were parsed with lineups
+    lineups = load_contest_lineups(contest)
+    if lineups is not None and len(lineups.ranks):
+        summary.num_entries = len(lineups.ranks)
+        summary.top_score = float(lineups.points.max())
+        if cash_rank:
+            cashed = lineups.ranks <= cash_rank
+            if cashed.any():
+                summary.cash_line = float(lineups.points[cashed].min())
+        winner = lineups.lineups[int(np.argmin(lineups.ranks))]
+        summary.winning_salary = sum(
+            salary_by_id.get(player_id, 0) for player_id in winner.tolist()
+        )
+    return summary
+
+
+def materialize_contest_summaries(contests):
+    """Rebuild and save the DKContestSummary of a DKContest queryset."""
+    for contest in contests:
+        summary = build_contest_summary(contest)
+        existing = DKContestSummary.objects.filter(contest=contest)
+        summary.pk = existing.values_list("pk", flat=True).first()
+        summary.save()
+        cache.bump_contest(contest.pk)
+    logger.info("Materialized %d contest summaries", len(contests))
+
+
+def get_contest_summary(contest):
+    """Return the saved summary of @contest, or build one if there's none yet."""
+    try:
+        return contest.summary
+    except DKContestSummary.DoesNotExist:
+        return build_contest_summary(contest)
@@ -1,3 +1,1593 @@
-from django.test import TestCase
-
-# Create your tests here.
+import csv
+import datetime
+import decimal
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import requests
+from bs4 import BeautifulSoup
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import make_aware
+
+from results import cache, daemon
+from results.analytics import (
+    UNKNOWN,
+    LineupCollector,
+    get_lineup_stats,
+    get_top_entries,
+)
+from results.api import encode_cursor
+from results.contests import ContestWrites, write_contests
+from results.lineups import (
+    ContestLineups,
+    load_contest_lineups,
+    pack_contest_lineups,
+    save_contest_lineups,
+    unpack_contest_lineups,
+)
+from results.models import (
+    DKContest,
+    DKContestLineups,
+    DKContestPayout,
+    DKResult,
+    DKResultOwnership,
+    DKSalary,
+    DKStandingsDownload,
+    DKStandingsIngest,
+    Player,
+)
+from results.parsers import client, dkcontests, dkresults, dksalaries, lobby
+from results.parsers.pages import extract
+from results.payouts import PayoutTable, UserROI, get_user_roi, write_payouts
+from results.players import PlayerNameIndex
+from results.summary import materialize_contest_summaries
+from results.utils import (
+    get_contest_report,
+    get_datetime_yearless,
+    get_incomplete_contest_ids,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# keep the page cache and version counters of the tests out of the real ones
+ISOLATED_CACHES = override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "test-pages",
+        },
+        "versions": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "test-versions",
+            "TIMEOUT": None,
+        },
+    }
+)
+
+
+def setUpModule():
+    ISOLATED_CACHES.enable()
+
+
+def tearDownModule():
+    ISOLATED_CACHES.disable()
+
+
+STANDINGS_HEADER = [
+    "Rank",
+    "EntryId",
+    "EntryName",
+    "TimeRemaining",
+    "Points",
+    "Lineup",
+    "",
+    "Player",
+    "Roster Position",
+    "%Drafted",
+    "FPTS",
+]
+
+
+def get_standings_rows(ownership, fail_after=None):
+    """
+    Yield a standings export with a player per row owned by @ownership(i),
+    raising after row @fail_after like an interrupted download.
+    """
+    yield STANDINGS_HEADER
+    for i in range(1, 31):
+        if fail_after is not None and i > fail_after:
+            raise IOError("connection reset")
+        yield [
+            str(i),
+            str(1000000 + i),
+            f"user{i} (1/1)",
+            "0",
+            str(300.0 - i),
+            f"PG Player {i}",
+            "",
+            f"Player {i}",
+            "PG",
+            f"{ownership(i) * 100:.2f}%",
+            "10.0",
+        ]
+
+
+def get_standings_csv(ownership):
+    file = StringIO()
+    csv.writer(file).writerows(get_standings_rows(ownership))
+    return file.getvalue().encode()
+
+
+def get_standings_response(status=200, content=b"", etag=None):
+    """Return a mock of the streamed standings export response."""
+    response = mock.MagicMock(
+        status_code=status,
+        url="https://www.draftkings.com/contest/exportfullstandingscsv/123",
+        headers={"Content-Type": "text/csv", "Content-Length": str(len(content))},
+    )
+    if etag:
+        response.headers["ETag"] = etag
+    response.__enter__.return_value = response
+    response.iter_content.return_value = iter([content])
+    return response
+
+
+class StandingsIngestTests(TestCase):
+    def setUp(self):
+        Player.objects.bulk_create(
+            Player(name=f"Player {i}", sport="NBA", team_abbv="BOS")
+            for i in range(1, 31)
+        )
+
+    def parse(self, rows, file_hash=None):
+        return dkresults.parse_contest_result_rows("NBA", "123", rows, file_hash)
+
+    @mock.patch.object(dkresults, "BATCH_SIZE", 10)
+    def test_streamed_file_restarts_after_partial_ingest(self):
+        with self.assertRaises(IOError):
+            self.parse(get_standings_rows(lambda i: i / 400, fail_after=25))
+        self.assertEqual(DKStandingsIngest.objects.get().last_offset, 20)
+
+        # a different export, streamed so its hash is only known at the end
+        ingest = self.parse(get_standings_rows(lambda i: 0.99))
+        ingest.file_hash = "b"
+        ingest.save()
+
+        ownership = DKResultOwnership.objects.filter(contest__dk_id="123")
+        self.assertEqual(
+            sorted(set(ownership.values_list("ownership", flat=True))), [0.99]
+        )
+        self.assertEqual(ownership.count(), 30)
+        self.assertTrue(DKStandingsIngest.objects.get().completed)
+
+    @mock.patch.object(dkresults, "BATCH_SIZE", 10)
+    def test_same_file_resumes_after_partial_ingest(self):
+        with self.assertRaises(IOError):
+            self.parse(get_standings_rows(lambda i: i / 400, fail_after=25), "a")
+
+        # only the rows after the checkpoint at row 20 are written again
+        written = set()
+        with mock.patch.object(
+            dkresults,
+            "write_ownership",
+            side_effect=lambda contest, ownership: written.update(ownership),
+        ):
+            self.parse(get_standings_rows(lambda i: i / 400), "a")
+        players = Player.objects.filter(name__in=[f"Player {i}" for i in range(21, 31)])
+        self.assertEqual(written, set(players.values_list("pk", flat=True)))
+
+    def test_completed_file_is_skipped(self):
+        self.parse(get_standings_rows(lambda i: 0.5), "a")
+        with mock.patch.object(dkresults, "flush_standings") as flush_standings:
+            self.parse(get_standings_rows(lambda i: 0.5), "a")
+        flush_standings.assert_not_called()
+        self.assertTrue(DKContest.objects.get(dk_id="123").standings_ingest.completed)
+
+
+class PlayerNameIndexTests(SimpleTestCase):
+    NAMES = [
+        "Otto Porter Jr.",
+        "Michael Porter Jr.",
+        "Kevin Porter Jr.",
+        "Lonzo Ball",
+        "LaMelo Ball",
+        "Jalen Williams",
+        "Jaylin Williams",
+        "Jalen Green",
+        "Nikola Jokić",
+        "Giannis Antetokounmpo",
+    ]
+
+    def setUp(self):
+        self.index = PlayerNameIndex(
+            Player(pk=pk, name=name, sport="NBA")
+            for pk, name in enumerate(self.NAMES, 1)
+        )
+
+    def get(self, name):
+        return self.index.get(name).name
+
+    def test_exact(self):
+        self.assertEqual(self.get("Lonzo Ball"), "Lonzo Ball")
+
+    def test_folded_and_accents(self):
+        self.assertEqual(self.get("lamelo ball"), "LaMelo Ball")
+        self.assertEqual(self.get("Nikola Jokic"), "Nikola Jokić")
+
+    def test_suffix_stripped(self):
+        self.assertEqual(self.get("Otto Porter"), "Otto Porter Jr.")
+        self.assertEqual(self.get("Kevin Porter Jr"), "Kevin Porter Jr.")
+
+    def test_unique_fuzzy_match(self):
+        self.assertEqual(self.get("Antetokounmpo"), "Giannis Antetokounmpo")
+        self.assertEqual(self.get("Giannis Antetokounpo"), "Giannis Antetokounmpo")
+
+    def test_ambiguous(self):
+        for name in ["Porter", "Ball", "Williams", "Jalen", "Jaylen Williams"]:
+            with self.assertRaises(Player.MultipleObjectsReturned, msg=name):
+                self.index.get(name)
+
+    def test_no_match(self):
+        for name in ["Stephen Curry", "", "Jr."]:
+            with self.assertRaises(Player.DoesNotExist, msg=name):
+                self.index.get(name)
+
+    def test_fuzzy_match_is_not_remembered(self):
+        self.get("Antetokounmpo")
+        self.assertNotIn("Antetokounmpo", self.index.exact)
+        self.get("lonzo ball")
+        self.assertIn("lonzo ball", self.index.exact)
+
+
+class StandingsDownloadTests(TestCase):
+    CONTENT = get_standings_csv(lambda i: 0.5)
+    HASH = hashlib.sha256(CONTENT).hexdigest()
+
+    def setUp(self):
+        Player.objects.bulk_create(
+            Player(name=f"Player {i}", sport="NBA", team_abbv="BOS")
+            for i in range(1, 31)
+        )
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        patcher = mock.patch.object(dkresults, "CSVPATH", Path(tmpdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respond(self, *responses):
+        """Answer the next standings requests with @responses."""
+        patcher = mock.patch.object(dkresults.client, "get", side_effect=responses)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def get_download(self):
+        return DKStandingsDownload.objects.select_related(
+            "contest__standings_ingest"
+        ).get(contest__dk_id="123")
+
+    def download(self, download=None, completed=False):
+        download = download or DKStandingsDownload()
+        status = dkresults.get_contest_result_data("123", download, completed)
+        dkresults.save_standings_download("123", download)
+        return status
+
+    def test_download_then_not_modified(self):
+        get = self.respond(
+            get_standings_response(content=self.CONTENT, etag='"v1"'),
+            get_standings_response(status=304),
+        )
+        self.assertEqual(self.download(), dkresults.DOWNLOADED)
+        self.assertIsNone(get.call_args[1]["headers"])
+        download = self.get_download()
+        self.assertEqual(download.etag, '"v1"')
+        self.assertEqual(download.content_hash, self.HASH)
+
+        self.assertEqual(self.download(download), dkresults.NOT_MODIFIED)
+        self.assertEqual(get.call_args[1]["headers"], {"If-None-Match": '"v1"'})
+        self.assertEqual(self.get_download().bytes_saved, len(self.CONTENT))
+
+    def test_changed_local_file_is_downloaded_again(self):
+        get = self.respond(
+            get_standings_response(content=self.CONTENT, etag='"v1"'),
+            get_standings_response(content=self.CONTENT, etag='"v1"'),
+        )
+        self.download()
+        dkresults.get_standings_filename("123").write_bytes(b"Rank\n")
+
+        # without conditional headers, so the server can't answer 304
+        self.assertEqual(self.download(self.get_download()), dkresults.DOWNLOADED)
+        self.assertIsNone(get.call_args[1]["headers"])
+        self.assertEqual(
+            dkresults.get_standings_filename("123").read_bytes(), self.CONTENT
+        )
+
+    def test_ingested_contest_is_skipped(self):
+        get = self.respond(get_standings_response(content=self.CONTENT))
+        self.download(completed=True)
+        dkresults.parse_contest_result_csv("NBA", "123")
+
+        download = self.get_download()
+        self.assertTrue(dkresults.is_ingested(download))
+        self.assertEqual(self.download(download), dkresults.INGESTED)
+        self.assertEqual(get.call_count, 1)
+        # streaming skips it the same way
+        status = dkresults.stream_contest_result_data("NBA", "123", download)
+        self.assertEqual(status, dkresults.INGESTED)
+        self.assertEqual(get.call_count, 1)
+
+    def interrupt_ingest(self, *responses):
+        get = self.respond(
+            get_standings_response(content=self.CONTENT, etag='"v1"'), *responses
+        )
+        self.download()
+        with self.assertRaises(IOError):
+            dkresults.parse_contest_result_rows(
+                "NBA",
+                "123",
+                get_standings_rows(lambda i: 0.5, fail_after=25),
+                self.HASH,
+            )
+        self.assertEqual(DKStandingsIngest.objects.get().last_offset, 20)
+        return get
+
+    def run_ingest(self, **kwargs):
+        with mock.patch.object(dkresults, "materialize_contest_summaries"):
+            with self.assertLogs(dkresults.logger, "INFO") as logs:
+                dkresults.run("NBA", ["123"], contest=False, **kwargs)
+        ingest = DKStandingsIngest.objects.get()
+        self.assertTrue(ingest.completed)
+        self.assertEqual(
+            DKResultOwnership.objects.filter(contest__dk_id="123").count(), 30
+        )
+        return "\n".join(logs.output), ingest
+
+    @mock.patch.object(dkresults, "BATCH_SIZE", 10)
+    def test_not_modified_resumes_incomplete_ingest(self):
+        self.interrupt_ingest(get_standings_response(status=304))
+        logs, ingest = self.run_ingest(workers=2)
+        self.assertIn("Resuming standings for 123 after row 20", logs)
+        self.assertEqual(self.get_download().bytes_saved, len(self.CONTENT))
+        self.assertEqual(ingest.file_hash, self.HASH)
+
+    @mock.patch.object(dkresults, "BATCH_SIZE", 10)
+    def test_saved_export_resumes_incomplete_ingest(self):
+        self.interrupt_ingest(get_standings_response(status=304))
+        logs, ingest = self.run_ingest(stream=False)
+        self.assertIn("Resuming standings for 123 after row 20", logs)
+        self.assertEqual(ingest.file_hash, self.HASH)
+
+    @mock.patch.object(dkresults, "BATCH_SIZE", 10)
+    def test_streamed_export_restarts_incomplete_ingest(self):
+        # there's no telling the stream is the interrupted file, so it's
+        # parsed from the start
+        get = self.interrupt_ingest(get_standings_response(content=self.CONTENT))
+        logs, ingest = self.run_ingest()
+        self.assertNotIn("Resuming", logs)
+        self.assertIsNone(get.call_args[1]["headers"])
+        self.assertEqual(ingest.file_hash, self.HASH)
+
+    def test_stream_asks_for_changes_only_after_complete_ingest(self):
+        get = self.respond(
+            get_standings_response(content=self.CONTENT, etag='"v1"'),
+            get_standings_response(status=304),
+        )
+        download = DKStandingsDownload()
+        status = dkresults.stream_contest_result_data("NBA", "123", download)
+        self.assertEqual(status, dkresults.DOWNLOADED)
+        self.assertIsNone(get.call_args[1]["headers"])
+        dkresults.save_standings_download("123", download)
+
+        status = dkresults.stream_contest_result_data("NBA", "123", download)
+        self.assertEqual(status, dkresults.NOT_MODIFIED)
+        self.assertEqual(get.call_args[1]["headers"], {"If-None-Match": '"v1"'})
+
+
+class SummaryRebuildTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_index_counts_results_without_summary(self):
+        summarized, unsummarized = [
+            DKContest.objects.create(dk_id=dk_id, sport="NBA", name=f"Contest {dk_id}")
+            for dk_id in ["1", "2"]
+        ]
+        for contest in [summarized, unsummarized]:
+            DKResult.objects.bulk_create(
+                DKResult(
+                    contest=contest, dk_id=f"{contest.dk_id}-{i}", rank=i, points=1
+                )
+                for i in range(3)
+            )
+        materialize_contest_summaries(DKContest.objects.filter(pk=summarized.pk))
+        DKResult.objects.filter(contest=summarized).delete()
+
+        response = self.client.get(reverse("results-index"))
+        contests = {c.dk_id: c for c in response.context["contests"]}
+        # the summary's count, and a live count for the unsummarized contest
+        self.assertEqual(contests["1"].num_results, 3)
+        self.assertEqual(contests["2"].num_results, 3)
+
+    def test_run_rebuilds_only_ingested_contests(self):
+        statuses = {
+            "1": dkresults.DOWNLOADED,
+            "2": dkresults.NOT_MODIFIED,
+            "3": dkresults.INGESTED,
+            "4": dkresults.EMPTY,
+        }
+        with mock.patch.object(
+            dkresults,
+            "stream_contest_result_data",
+            side_effect=lambda sport, contest_id, *args: statuses[contest_id],
+        ), mock.patch.object(dkresults, "materialize_contest_summaries") as rebuild:
+            dkresults.run("NBA", list(statuses), contest=False)
+        contests = rebuild.call_args[0][0]
+        self.assertEqual([c.dk_id for c in contests], ["1"])
+
+
+class StandingsFileTests(TestCase):
+    def test_save_creates_missing_results_directory(self):
+        content = b"Rank,EntryId\n1,1000001\n"
+        response = mock.Mock(
+            url="https://www.draftkings.com/contest/exportfullstandingscsv/123",
+            headers={"Content-Type": "text/csv"},
+        )
+        response.iter_content.return_value = iter([content])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir, "data", "results")
+            with mock.patch.object(dkresults, "CSVPATH", path):
+                file_hash = dkresults.save_contest_standings_to_file(response, "123")
+                saved = dkresults.get_standings_filename("123").read_bytes()
+        self.assertEqual(saved, content)
+        self.assertEqual(file_hash, hashlib.sha256(content).hexdigest())
+
+
+class MissingDataTests(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        player = Player.objects.create(name="Player 1", sport="NBA")
+        # dk_id => (results, ownership rows, payouts, positions paid)
+        contests = {
+            # a showdown contest has fewer ownership rows than a classic roster
+            "showdown": (1, 1, 1, 10),
+            "standings": (0, 0, 1, 10),
+            "ownership": (1, 0, 1, 10),
+            "payouts": (1, 1, 0, None),
+        }
+        for dk_id, (results, ownership, payouts, positions_paid) in contests.items():
+            contest = DKContest.objects.create(
+                dk_id=dk_id,
+                sport="NBA",
+                name=dk_id,
+                date=today,
+                positions_paid=positions_paid,
+            )
+            for i in range(results):
+                DKResult.objects.create(
+                    contest=contest, dk_id=f"{dk_id}-{i}", rank=1, points=1
+                )
+            if ownership:
+                DKResultOwnership.objects.create(
+                    contest=contest, player=player, ownership=1
+                )
+            if payouts:
+                DKContestPayout.objects.create(
+                    contest=contest, upper_rank=1, lower_rank=1, payout=10
+                )
+        # too old, and another sport
+        DKContest.objects.create(
+            dk_id="old", sport="NBA", date=today - datetime.timedelta(days=30)
+        )
+        DKContest.objects.create(dk_id="nfl", sport="NFL", date=today)
+
+    def test_missing_data(self):
+        report = {c.dk_id: c.missing for c in get_contest_report("NBA")}
+        self.assertEqual(
+            report,
+            {
+                "showdown": [],
+                "standings": ["standings"],
+                "ownership": ["ownership"],
+                "payouts": ["payouts", "contest"],
+            },
+        )
+
+    def test_incomplete_contest_ids_in_one_query(self):
+        with self.assertNumQueries(1):
+            contest_ids = get_incomplete_contest_ids("NBA")
+        # most incomplete first
+        self.assertEqual(contest_ids, ["standings", "ownership", "payouts"])
+
+
+class LineupStatsTests(SimpleTestCase):
+    # 4 entries of 3 players, the first two the same players in another order
+    RANKS = np.array([1, 2, 3, 4])
+    LINEUPS = np.array([[1, 2, 3], [3, 2, 1], [1, 4, UNKNOWN], [4, 5, 6]])
+    TEAMS = {1: "AAA", 2: "AAA", 3: "BBB", 4: "BBB", 5: "BBB", 6: "CCC"}
+
+    def setUp(self):
+        self.stats = get_lineup_stats(self.RANKS, self.LINEUPS, self.TEAMS)
+
+    def test_entries(self):
+        self.assertEqual(self.stats.entries, 4)
+        # at least one entry is a top entry
+        self.assertEqual(self.stats.top_entries, 1)
+        self.assertEqual(self.stats.unique_lineups, 3)
+        self.assertEqual(self.stats.duplicated_entries, 2)
+        self.assertEqual(self.stats.max_duplicates, 2)
+        self.assertEqual(self.stats.unknown_players, 1)
+
+    def test_player_exposure(self):
+        # (player id, ownership, top ownership, leverage), without UNKNOWN
+        self.assertEqual(
+            self.stats.players,
+            [
+                (1, 0.75, 1.0, 0.25),
+                (2, 0.5, 1.0, 0.5),
+                (3, 0.5, 1.0, 0.5),
+                (4, 0.5, 0.0, -0.5),
+                (5, 0.25, 0.0, -0.25),
+                (6, 0.25, 0.0, -0.25),
+            ],
+        )
+
+    def test_stacks(self):
+        # players 1 and 2 in the first two entries, 4 and 5 in the last
+        self.assertEqual(
+            self.stats.stacks, [("AAA", 2, 2, 0.5, 1.0), ("BBB", 2, 1, 0.25, 0.0)]
+        )
+        stats = get_lineup_stats(self.RANKS, self.LINEUPS, {})
+        self.assertEqual(stats.stacks, [])
+
+    def test_ties_at_the_top_cutoff(self):
+        # 1% of 300 entries is 3, and all four entries tied 1st are top entries
+        ranks = np.array([1, 1, 1, 1] + list(range(5, 301)))
+        self.assertEqual(get_top_entries(ranks).sum(), 4)
+
+    def test_collector(self):
+        index = PlayerNameIndex(
+            Player(pk=pk, name=name, sport="NBA", team_abbv=team)
+            for pk, name, team in [
+                (1, "Joel Embiid", "PHI"),
+                (2, "LeBron James", "LAL"),
+                (3, "Anthony Davis", "LAL"),
+            ]
+        )
+        collector = LineupCollector("NBA", index)
+        collector.add(10, "user1", 1, 300.0, "C Joel Embiid F LeBron James PF Nobody")
+        collector.add(11, "user2", 2, 250.0, "PF Anthony Davis SF LeBron James")
+        lineups = collector.get_lineups()
+        self.assertEqual(
+            lineups.lineups.tolist(),
+            [[1, 2] + [UNKNOWN] * 6, [3, 2] + [UNKNOWN] * 6],
+        )
+        self.assertEqual(collector.teams, {1: "PHI", 2: "LAL", 3: "LAL"})
+        stats = collector.get_stats()
+        self.assertEqual(stats.stacks, [("LAL", 2, 1, 0.5, 0.0)])
+
+
+class LineupStorageTests(TestCase):
+    ROSTER_SIZE = 8
+
+    def get_contest_lineups(self, num_players):
+        """Return ContestLineups of entries that roster @num_players players."""
+        player_ids = np.arange(num_players) * 7 + 100000
+        player_ids[0] = UNKNOWN
+        entries = -(-num_players // self.ROSTER_SIZE)
+        lineups = np.resize(player_ids, entries * self.ROSTER_SIZE)
+        return ContestLineups(
+            entry_ids=np.arange(entries, dtype=np.int64) + 2**40,
+            names=[f"user{i}" for i in range(entries)],
+            ranks=np.arange(1, entries + 1, dtype=np.intc),
+            points=np.linspace(300, 100, entries).round(2),
+            lineups=lineups.reshape(entries, self.ROSTER_SIZE).astype(np.intc),
+        )
+
+    def assert_round_trip(self, contest_lineups, code_width):
+        fields = pack_contest_lineups(contest_lineups)
+        # one code of @code_width bytes per roster slot
+        self.assertEqual(
+            len(zlib.decompress(fields["lineups"])),
+            contest_lineups.lineups.size * code_width,
+        )
+        unpacked = unpack_contest_lineups(DKContestLineups(**fields))
+        for name in ["entry_ids", "ranks", "points", "lineups"]:
+            np.testing.assert_array_equal(
+                getattr(unpacked, name), getattr(contest_lineups, name), err_msg=name
+            )
+        self.assertEqual(unpacked.names, contest_lineups.names)
+
+    def test_byte_codes(self):
+        self.assert_round_trip(self.get_contest_lineups(256), 1)
+
+    def test_two_byte_codes(self):
+        self.assert_round_trip(self.get_contest_lineups(257), 2)
+
+    def test_saved_lineups(self):
+        contest = DKContest.objects.create(dk_id="123", sport="NBA")
+        self.assertIsNone(load_contest_lineups(contest))
+        contest_lineups = self.get_contest_lineups(300)
+        save_contest_lineups(contest, contest_lineups)
+        loaded = load_contest_lineups(contest)
+        np.testing.assert_array_equal(loaded.lineups, contest_lineups.lineups)
+        self.assertEqual(loaded.names, contest_lineups.names)
+
+
+class PayoutTests(TestCase):
+    # 1st: $100, 2nd-3rd: $50, 4th-5th: $20
+    ROWS = [
+        (1, 1, decimal.Decimal("100")),
+        (2, 3, decimal.Decimal("50")),
+        (4, 5, decimal.Decimal("20")),
+    ]
+
+    def setUp(self):
+        self.table = PayoutTable(self.ROWS)
+
+    def test_get(self):
+        self.assertEqual(
+            [self.table.get(rank) for rank in range(7)], [0, 100, 50, 50, 20, 20, 0]
+        )
+        self.assertEqual(self.table.paid_ranks, 5)
+
+    def test_ties_straddling_payout_boundaries(self):
+        # three entries tied 2nd split 2nd-4th, two tied 5th split 5th-6th
+        self.assertEqual(
+            self.table.assign([1, 2, 2, 2, 5, 5, 7]).tolist(),
+            [100, 40, 40, 40, 10, 10, 0],
+        )
+
+    def test_ranks_past_last_paid_place(self):
+        self.assertEqual(self.table.assign([6, 8, 8, 100]).tolist(), [0, 0, 0, 0])
+        self.assertEqual(PayoutTable([]).assign([1, 2]).tolist(), [0, 0])
+
+    def test_user_roi(self):
+        lineups = SimpleNamespace(
+            ranks=[1, 2, 2, 2, 8], names=["b", "a", "a", "c", "c"]
+        )
+        self.assertEqual(
+            get_user_roi(lineups, self.table, 20),
+            [
+                UserROI("b", 1, 20, 100, 4.0),
+                UserROI("a", 2, 40, 80, 1.0),
+                UserROI("c", 2, 40, 40, 0.0),
+            ],
+        )
+
+    def test_user_roi_without_entry_fee(self):
+        lineups = SimpleNamespace(ranks=[1, 9], names=["a", "b"])
+        self.assertEqual(
+            get_user_roi(lineups, self.table, 0),
+            [UserROI("a", 1, 0, 100, None), UserROI("b", 1, 0, 0, None)],
+        )
+
+    def test_write_payouts_replaces_stale_ranges(self):
+        contest = DKContest.objects.create(dk_id="123", sport="NBA", name="Contest")
+        write_payouts(contest, self.ROWS)
+        write_payouts(
+            contest,
+            [(1, 1, decimal.Decimal("120")), (2, 5, decimal.Decimal("30"))],
+        )
+        self.assertEqual(
+            list(
+                contest.payouts.order_by("upper_rank").values_list(
+                    "upper_rank", "lower_rank", "payout"
+                )
+            ),
+            [(1, 1, decimal.Decimal("120")), (2, 5, decimal.Decimal("30"))],
+        )
+        self.assertEqual(
+            PayoutTable.for_contest(contest).assign([2, 2]).tolist(), [30, 30]
+        )
+
+
+class APITests(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        dates = [0, 1, None, 1, 3, None, 0, 2]
+        self.contests = [
+            DKContest.objects.create(
+                dk_id=str(i),
+                sport="NBA",
+                name=f"Contest {i}",
+                date=None if days is None else today - datetime.timedelta(days=days),
+            )
+            for i, days in enumerate(dates)
+        ]
+        self.contest = self.contests[0]
+        for i, rank in enumerate([3, None, 1, 2, 2, None, 5]):
+            DKResult.objects.create(
+                contest=self.contest, dk_id=str(i), name=f"user{i}", rank=rank, points=1
+            )
+        for i, ownership in enumerate([0.5, 0.25, 0.5, 0.1, 0.25, 0.9, 0.5]):
+            DKResultOwnership.objects.create(
+                contest=self.contest,
+                player=Player.objects.create(name=f"Player {i}", sport="NBA"),
+                ownership=ownership,
+            )
+
+    def get(self, name, args=(), **params):
+        return self.client.get(reverse(name, args=args), params)
+
+    def walk(self, name, args=(), **params):
+        """Return the rows of every page of an endpoint, following cursors."""
+        rows, pages = [], 0
+        while True:
+            response = self.get(name, args, limit=2, **params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            rows.extend(page["data"])
+            pages += 1
+            if page["next"] is None:
+                return rows, pages
+            params["after"] = page["next"]
+
+    def test_contests_by_date(self):
+        rows, pages = self.walk("api-contests", sport="NBA")
+        # newest first and contests without a date last, ties by id
+        expected = sorted(
+            self.contests,
+            key=lambda c: (c.date is not None, c.date, c.pk),
+            reverse=True,
+        )
+        self.assertEqual([row["id"] for row in rows], [c.pk for c in expected])
+        self.assertEqual(pages, 4)
+
+    def test_results_by_rank(self):
+        rows, _ = self.walk("api-results", [self.contest.pk], fields="rank,name")
+        self.assertEqual([row["rank"] for row in rows], [None, None, 1, 2, 2, 3, 5])
+        self.assertEqual([row["name"] for row in rows][:2], ["user1", "user5"])
+        self.assertEqual(set(rows[0]), {"rank", "name"})
+
+    def test_ownership_by_ownership(self):
+        rows, _ = self.walk("api-ownership", [self.contest.pk])
+        expected = sorted(
+            DKResultOwnership.objects.all(),
+            key=lambda o: (o.ownership, o.pk),
+            reverse=True,
+        )
+        self.assertEqual([row["id"] for row in rows], [o.pk for o in expected])
+        self.assertEqual(rows[0]["player_name"], "Player 5")
+
+    def test_unknown_fields(self):
+        response = self.get("api-results", [self.contest.pk], fields="name,secret")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Unknown fields: secret"})
+
+    def test_bad_cursor_and_limit(self):
+        for params in [
+            {"after": "not a cursor"},
+            {"after": encode_cursor(1, 2)[:-4]},
+            {"limit": "ten"},
+        ]:
+            response = self.get("api-results", [self.contest.pk], **params)
+            self.assertEqual(response.status_code, 400, params)
+        response = self.get("api-roi", [self.contest.pk], limit="ten")
+        self.assertEqual(response.status_code, 400)
+
+    def test_ndjson_matches_pages(self):
+        for name, args in [
+            ("api-contests", ()),
+            ("api-results", [self.contest.pk]),
+            ("api-ownership", [self.contest.pk]),
+        ]:
+            response = self.get(name, args, format="ndjson")
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            lines = b"".join(response.streaming_content).decode().splitlines()
+            rows, _ = self.walk(name, args)
+            self.assertEqual([json.loads(line) for line in lines], rows)
+
+
+class ContestDetailQueryTests(TestCase):
+    """The detail page's queries don't grow with the players in a contest."""
+
+    OWNED_PLAYERS = 500
+
+    def setUp(self):
+        caches["default"].clear()
+        self.contest = DKContest.objects.create(
+            dk_id="123", sport="NBA", name="NBA $50K Double Up", draft_group_id=1
+        )
+        Player.objects.bulk_create(
+            Player(name=f"Player {i}", sport="NBA", position="PG")
+            for i in range(self.OWNED_PLAYERS)
+        )
+        players = list(Player.objects.order_by("pk"))
+        DKSalary.objects.bulk_create(
+            DKSalary(player=player, salary=3000 + i * 10, draft_group_id=1)
+            for i, player in enumerate(players)
+        )
+        DKResultOwnership.objects.bulk_create(
+            DKResultOwnership(
+                contest=self.contest,
+                player=player,
+                ownership=i / self.OWNED_PLAYERS,
+                fpts=20,
+            )
+            for i, player in enumerate(players)
+        )
+        DKResult.objects.bulk_create(
+            DKResult(
+                contest=self.contest, dk_id=str(i), name=f"user{i}", rank=i, points=300
+            )
+            for i in range(1, 9)
+        )
+        self.url = reverse("detail", args=[self.contest.pk])
+
+    def test_summarized_contest(self):
+        materialize_contest_summaries(DKContest.objects.filter(pk=self.contest.pk))
+        # the page cache key and the contest with its summary
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Player 499")
+
+        # then only the page cache key
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_contest_without_summary(self):
+        # the summary is built on the fly, still with a query per table
+        with self.assertNumQueries(7):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Player 499")
+
+
+class PageParserTests(SimpleTestCase):
+    """Parsing extract()ed pages gives the same results as parsing with html5lib."""
+
+    CONTEST = {
+        "name": "NBA $50K Shot & Chaser [$10K to 1st]",
+        "total_prizes": decimal.Decimal("50000.00"),
+        "date": get_datetime_yearless("Nov 29"),
+        "entries": 5000,
+        "positions_paid": 1150,
+    }
+
+    def parse(self, filename, parse, match):
+        html = (FIXTURES / filename).read_text(encoding="utf8")
+        result = parse(extract(html, match))
+        self.assertEqual(result, parse(BeautifulSoup(html, "html5lib")))
+        return result
+
+    def parse_contest(self, filename):
+        return self.parse(
+            filename, dkresults.parse_contest_page, dkresults.is_contest_header
+        )
+
+    def parse_prizes(self, filename):
+        return self.parse(filename, dkresults.parse_prize_page, dkresults.is_prize_cell)
+
+    def test_completed_contest(self):
+        self.assertEqual(self.parse_contest("gamecenter.html"), self.CONTEST)
+
+    def test_completed_contest_with_numeric_date(self):
+        self.assertEqual(
+            self.parse_contest("gamecenter-date.html"),
+            dict(self.CONTEST, date=get_datetime_yearless("Feb 18")),
+        )
+
+    def test_contest_in_progress(self):
+        self.assertIsNone(self.parse_contest("gamecenter-live.html"))
+
+    def test_prizes(self):
+        self.assertEqual(
+            self.parse_prizes("detailspop.html"),
+            (
+                decimal.Decimal("25"),
+                [
+                    (1, 1, decimal.Decimal("2500.00")),
+                    (2, 5, decimal.Decimal("1000.00")),
+                    (6, 100, decimal.Decimal("50.00")),
+                ],
+            ),
+        )
+
+    def test_prizes_with_unclosed_cells(self):
+        self.assertEqual(
+            self.parse_prizes("detailspop-unclosed.html"),
+            (
+                decimal.Decimal("3"),
+                [
+                    (1, 1, decimal.Decimal("1000.00")),
+                    (2, 2, decimal.Decimal("500.00")),
+                    (3, 10, decimal.Decimal("20.00")),
+                ],
+            ),
+        )
+
+    def test_missing_contest(self):
+        html = (FIXTURES / "missing.html").read_text(encoding="utf8")
+        for parse, match in [
+            (dkresults.parse_contest_page, dkresults.is_contest_header),
+            (dkresults.parse_prize_page, dkresults.is_prize_cell),
+        ]:
+            for page in [extract(html, match), BeautifulSoup(html, "html5lib")]:
+                with self.assertRaises(IndexError):
+                    parse(page)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        caches["versions"].clear()
+        Player.objects.bulk_create(
+            Player(name=f"Player {i}", sport="NBA", team_abbv="BOS")
+            for i in range(1, 31)
+        )
+        self.contest = DKContest.objects.create(
+            dk_id="123", sport="NBA", name="NBA $50K Double Up", draft_group_id=1
+        )
+        self.url = reverse("detail", args=[self.contest.pk])
+
+    def get_misses(self):
+        misses = cache.get_stats()["misses"]
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        return cache.get_stats()["misses"] - misses
+
+    def test_bump_version(self):
+        version = cache.get_version("index")
+        cache.bump_version("index")
+        self.assertNotEqual(cache.get_version("index"), version)
+        # a counter that was never read is created by a bump
+        cache.bump_version("contest:0")
+        self.assertIsNotNone(caches["versions"].get("contest:0"))
+
+    def test_ingest_invalidates_cached_page(self):
+        version = cache.get_version(f"contest:{self.contest.pk}")
+        self.assertEqual(self.get_misses(), 1)
+        self.assertEqual(self.get_misses(), 0)
+
+        dkresults.parse_contest_result_rows(
+            "NBA", "123", get_standings_rows(lambda i: 0.5)
+        )
+        self.assertNotEqual(cache.get_version(f"contest:{self.contest.pk}"), version)
+        self.assertEqual(self.get_misses(), 1)
+        self.assertContains(self.client.get(self.url), "299.0")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    /ok/<n> answers 200, /flaky/<n> answers 503 the first time it's requested
+    and /slow/<n> answers after a second.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # (path, client port) of every request
+    requests = []
+    counts = Counter()
+
+    def do_GET(self):
+        self.requests.append((self.path, self.client_address[1]))
+        self.counts[self.path] += 1
+        if self.path.startswith("/slow/"):
+            time.sleep(1)
+        status = 200
+        if self.path.startswith("/flaky/") and self.counts[self.path] == 1:
+            status = 503
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class ClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubHandler.requests.clear()
+        StubHandler.counts.clear()
+        # a fresh session with cookies from an empty DK_COOKIES, never from a
+        # browser, and without waiting between requests
+        for name, value in [
+            ("SESSION", None),
+            ("COOKIES", None),
+            ("COOKIE_SOURCE", "env"),
+            ("BACKOFF_FACTOR", 0),
+            ("RATE_LIMITER", client.RateLimiter(None)),
+            ("STATS", client.LatencyStats()),
+        ]:
+            patcher = mock.patch.object(client, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(
+            os.environ, {"DK_COOKIE_SOURCE": "env", "DK_COOKIES": ""}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: client.SESSION and client.SESSION.close())
+
+    def test_connection_is_kept_alive(self):
+        for i in range(3):
+            self.assertEqual(client.get(f"{self.url}/ok/{i}").status_code, 200)
+        ports = {port for _, port in StubHandler.requests}
+        self.assertEqual(len(StubHandler.requests), 3)
+        self.assertEqual(len(ports), 1)
+
+    def test_retries_service_unavailable(self):
+        response = client.get(f"{self.url}/flaky/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StubHandler.counts["/flaky/1"], 2)
+
+    def test_timeout_is_applied(self):
+        with mock.patch.object(client.requests.Session, "get") as get:
+            client.get(f"{self.url}/ok/1")
+        self.assertEqual(get.call_args[1]["timeout"], client.TIMEOUT)
+
+        start = time.perf_counter()
+        with mock.patch.object(client, "TIMEOUT", (1, 0.1)):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                client.get(f"{self.url}/slow/1")
+        # each attempt gives up long before the page's one second
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_requests_are_recorded_by_endpoint(self):
+        client.get(f"{self.url}/ok/1")
+        client.get(f"{self.url}/ok/2")
+        client.get(f"{self.url}/flaky/3")
+        summary = client.STATS.summary()
+        self.assertEqual(summary["/ok/{id}"][0], 2)
+        self.assertEqual(summary["/flaky/{id}"][0], 1)
+
+
+class FetchCommandTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(client, "RATE_LIMITER", client.RATE_LIMITER)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_workers_must_be_positive(self):
+        for option in ["--workers", "--salary-workers"]:
+            with self.assertRaisesMessage(CommandError, "must be at least 1"):
+                call_command("fetch", "-s", "NBA", option, "0")
+
+    @mock.patch.object(dkresults, "run")
+    def test_save_standings(self, run):
+        call_command("fetch", "-s", "NBA", "-r", "123")
+        self.assertIs(run.call_args[1]["stream"], True)
+
+        call_command("fetch", "-s", "NBA", "-r", "123", "--save-standings")
+        self.assertIs(run.call_args[1]["stream"], False)
+
+    def test_rate_limit(self):
+        call_command("fetch", "-s", "NBA", "--rate-limit", "2")
+        self.assertEqual(client.RATE_LIMITER.interval, 0.5)
+
+        call_command("fetch", "-s", "NBA", "--rate-limit", "0")
+        self.assertEqual(client.RATE_LIMITER.interval, 0)
+
+        with self.assertRaisesMessage(CommandError, "must not be negative"):
+            call_command("fetch", "-s", "NBA", "--rate-limit", "-1")
+
+
+class DecodeLobbyTests(SimpleTestCase):
+    CONTEST = {
+        "sd": "/Date(1574981400000)/",
+        "n": "NBA $50K Shot",
+        "id": 123,
+        "dg": 1,
+        "po": 50000,
+        "m": 5000,
+        "a": 10,
+        "ec": 0,
+        "mec": 150,
+        "attr": {},
+    }
+
+    def test_decode(self):
+        content = json.dumps({"Contests": [self.CONTEST]}).encode()
+        self.assertEqual(lobby.decode_lobby(content), {"Contests": [self.CONTEST]})
+
+    @unittest.skipIf(lobby.msgspec is None, "msgspec isn't installed")
+    def test_unexpected_types_fall_back(self):
+        contest = dict(self.CONTEST, dg=None)
+        content = json.dumps({"Contests": [contest]}).encode()
+        with self.assertLogs(lobby.logger, "WARNING") as logs:
+            self.assertEqual(lobby.decode_lobby(content), {"Contests": [contest]})
+        self.assertIn("with msgspec failed", logs.output[0])
+
+
+class ContestWriteTests(TestCase):
+    """write_contests creates new contests and only updates changed ones."""
+
+    def get_contest_fields(self):
+        start = make_aware(datetime.datetime(2019, 11, 28, 19, 30))
+        return {
+            dk_id: {
+                "date": start.date(),
+                "datetime": start,
+                "sport": "NBA",
+                "name": f"NBA Double Up {dk_id}",
+                "draft_group_id": 1,
+                "total_prizes": 4500.5,
+                "entries": 200,
+                "entry_fee": 25,
+            }
+            for dk_id in (1, 2, 3)
+        }
+
+    def test_rewrite_is_unchanged(self):
+        contests, counts = write_contests(self.get_contest_fields())
+        self.assertEqual(counts, ContestWrites(3, 0, 0))
+        self.assertEqual(sorted(contests), ["1", "2", "3"])
+        self.assertTrue(all(contest.pk for contest in contests.values()))
+
+        name = f"contest:{contests['1'].pk}"
+        version = cache.get_version(name)
+        with CaptureQueriesContext(connection) as queries:
+            _, counts = write_contests(self.get_contest_fields())
+        # one query to read the contests, no inserts or updates
+        statements = [
+            query["sql"].split()[0]
+            for query in queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        self.assertEqual(statements, ["SELECT"])
+        self.assertEqual(counts, ContestWrites(0, 0, 3))
+        self.assertEqual(DKContest.objects.count(), 3)
+        self.assertEqual(cache.get_version(name), version)
+
+    def test_changed_contest_is_updated(self):
+        write_contests(self.get_contest_fields())
+        contest_fields = self.get_contest_fields()
+        contest_fields[2]["entries"] = 250
+        contest_fields[4] = dict(contest_fields[3], name="NBA Double Up 4")
+        _, counts = write_contests(contest_fields)
+        self.assertEqual(counts, ContestWrites(1, 1, 2))
+        self.assertEqual(
+            dict(DKContest.objects.values_list("dk_id", "entries")),
+            {"1": 200, "2": 250, "3": 200, "4": 200},
+        )
+
+
+class SalaryWriteTests(TestCase):
+    """Re-ingesting a salary file only writes what changed."""
+
+    POSITIONS = ["PG", "SG", "SF", "PF", "C"]
+
+    def get_salary_rows(self, positions, salary=3000):
+        rows = [
+            "Position,Name + ID,Name,ID,Roster Position,Salary,Game Info,"
+            "TeamAbbrev,AvgPointsPerGame"
+        ]
+        for i, pos in enumerate(positions):
+            rows.append(
+                f"{pos},Player {i} ({i}),Player {i},{i},{pos}/UTIL,{salary + i},"
+                f"AAA@BBB 11/28/2019 07:30PM ET,AAA,20.5"
+            )
+        return rows
+
+    def write(self, rows):
+        return dksalaries.write_salaries_to_db(
+            rows, "NBA", 7, 70, datetime.date(2019, 11, 28)
+        )
+
+    def get_salaries(self):
+        return list(
+            DKSalary.objects.order_by("pk").values_list(
+                "pk", "player__name", "salary", "draft_group_id"
+            )
+        )
+
+    def test_changed_position_is_updated(self):
+        self.write(self.get_salary_rows(self.POSITIONS))
+        salaries = self.get_salaries()
+        updated = dict(Player.objects.values_list("name", "updated_at"))
+
+        positions = ["PG", "SG", "G", "PF", "C"]
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.write(self.get_salary_rows(positions))
+        self.assertEqual(len(rows), 5)
+        # one bulk update of Player 2 and no inserts
+        statements = [query["sql"].split()[0] for query in queries]
+        self.assertEqual(statements.count("UPDATE"), 1)
+        self.assertNotIn("INSERT", statements)
+
+        self.assertEqual(self.get_salaries(), salaries)
+        players = Player.objects.order_by("name")
+        self.assertEqual(
+            [(p.name, p.position, p.dk_position) for p in players],
+            [
+                (f"Player {i}", old, new)
+                for i, (old, new) in enumerate(zip(self.POSITIONS, positions))
+            ],
+        )
+        self.assertEqual(
+            [p.name for p in players if p.updated_at != updated[p.name]],
+            ["Player 2"],
+        )
+
+    def test_existing_salaries_are_ignored(self):
+        self.write(self.get_salary_rows(self.POSITIONS))
+        salaries = self.get_salaries()
+        with self.assertLogs(dksalaries.logger, "WARNING") as logs:
+            self.write(self.get_salary_rows(self.POSITIONS, salary=4000))
+        self.assertEqual(len(logs.output), 5)
+        self.assertEqual(self.get_salaries(), salaries)
+
+    def test_concurrent_salaries_are_ignored(self):
+        self.write(self.get_salary_rows(self.POSITIONS))
+        salaries = self.get_salaries()
+        # another ingest saved the salaries after this one read them
+        objects = DKSalary.objects
+        filter_salaries = objects.filter
+        with mock.patch.object(
+            objects,
+            "filter",
+            lambda **kwargs: (
+                objects.none()
+                if kwargs == {"draft_group_id": 7}
+                else filter_salaries(**kwargs)
+            ),
+        ):
+            self.write(self.get_salary_rows(self.POSITIONS, salary=4000))
+        self.assertEqual(self.get_salaries(), salaries)
+
+
+class ContestIndexTests(SimpleTestCase):
+    """ContestIndex picks the same contest as the max() scan it replaced."""
+
+    # (name, entry fee, entries, max entries, double up, guaranteed)
+    KINDS = [
+        ("NBA $25 Double Up", 25, 500, 1, True, True),
+        ("NBA $25 Double Up Turbo", 25, 900, 1, True, True),
+        ("NBA $25 Double Up Late", 25, 900, 1, True, True),
+        ("NBA $25 Double Up Multi", 25, 5000, 150, True, True),
+        ("NBA $25 Single Entry", 25, 8000, 1, False, True),
+        ("NBA $25 Double Up Sat", 25, 7000, 1, True, False),
+        ("NBA $10 Double Up", 10, 300, 1, True, True),
+        ("NBA $10 Double Up Night", 10, 1000, 1, True, True),
+        ("NBA $10 Shot", 10, 20000, 150, False, True),
+        ("NBA $5 Double Up Multi", 5, 400, 3, True, True),
+    ]
+
+    def setUp(self):
+        self.contests = [
+            dkcontests.Contest(
+                {
+                    "sd": "/Date(1574981400000)/",
+                    "n": name,
+                    "id": i,
+                    "dg": 1,
+                    "po": 1000,
+                    "m": entries,
+                    "a": fee,
+                    "ec": 0,
+                    "mec": max_entries,
+                    "attr": (
+                        {"IsDoubleUp": double_up, "IsGuaranteed": guaranteed}
+                        if double_up or guaranteed
+                        else {}
+                    ),
+                }
+            )
+            for i, (
+                name,
+                fee,
+                entries,
+                max_entries,
+                double_up,
+                guaranteed,
+            ) in enumerate(self.KINDS)
+        ]
+
+    def get_largest_by_max(self, entry_fee, query=None, exclude=None):
+        matches = [
+            c
+            for c in self.contests
+            if dkcontests.match_contest_criteria(c, entry_fee, query, exclude)
+        ]
+        return max(matches, key=lambda x: x.entries) if matches else None
+
+    def test_matches_max(self):
+        index = dkcontests.ContestIndex(self.contests)
+        for entry_fee in (5, 10, 25, 50):
+            for query, exclude in (
+                (None, None),
+                ("Double Up", None),
+                (None, "Turbo"),
+                ("Double Up", "Late"),
+                ("Multi", None),
+            ):
+                with self.subTest(entry_fee=entry_fee, query=query, exclude=exclude):
+                    self.assertIs(
+                        index.get_largest(entry_fee, query, exclude),
+                        self.get_largest_by_max(entry_fee, query, exclude),
+                    )
+
+    def test_ties_keep_lobby_order(self):
+        # both 900 entry contests tie, max() keeps the first one
+        index = dkcontests.ContestIndex(self.contests)
+        self.assertEqual(index.get_largest(25).name, "NBA $25 Double Up Turbo")
+        self.assertEqual(
+            index.get_largest(25, exclude="Turbo").name, "NBA $25 Double Up Late"
+        )
+
+    def test_excludes_other_kinds(self):
+        # the larger multi entry, non double up and non guaranteed contests
+        # of the same fee are never picked
+        index = dkcontests.ContestIndex(self.contests)
+        self.assertEqual(index.get_largest(10).name, "NBA $10 Double Up Night")
+        self.assertIsNone(index.get_largest(5))
+        self.assertIsNone(index.get_largest(25, query="Single Entry"))
+
+    def test_get_largest_contest(self):
+        self.assertIs(
+            dkcontests.get_largest_contest(self.contests, 25),
+            self.get_largest_by_max(25),
+        )
+
+
+class QueryPlanTests(TestCase):
+    """The hot queries use indexes on a seeded and analyzed database."""
+
+    def setUp(self):
+        sports = ["NBA", "NFL", "MLB", "NHL"]
+        today = datetime.date.today()
+        Player.objects.bulk_create(
+            Player(name=f"Player {i}", sport=sports[i % 4], team_abbv=f"T{i % 30}")
+            for i in range(2000)
+        )
+        DKContest.objects.bulk_create(
+            DKContest(
+                dk_id=str(i),
+                sport=sports[i % 4],
+                name=f"Contest {i}",
+                date=today - datetime.timedelta(days=i % 60),
+                entry_fee=[3, 5, 25][i % 3],
+                draft_group_id=i % 50,
+            )
+            for i in range(400)
+        )
+        players = list(Player.objects.order_by("pk"))
+        contests = list(DKContest.objects.order_by("pk"))
+        DKSalary.objects.bulk_create(
+            DKSalary(player=player, salary=3000 + i, draft_group_id=i % 50)
+            for i, player in enumerate(players)
+        )
+        DKResult.objects.bulk_create(
+            DKResult(contest=contest, dk_id=f"{i}-{rank}", rank=rank, points=100)
+            for i, contest in enumerate(contests)
+            for rank in range(1, 11)
+        )
+        DKResultOwnership.objects.bulk_create(
+            DKResultOwnership(contest=contest, player=player, ownership=0.1, fpts=10)
+            for contest in contests[:50]
+            for player in players[:100]
+        )
+
+    def test_no_full_table_scans(self):
+        for sport in ["NBA", "NFL"]:
+            call_command("queryplans", "-s", sport, "--analyze", stdout=StringIO())
+
+
+class FakeClock:
+    """Stands in for the time module, stopping the daemon at @end seconds."""
+
+    class Stop(Exception):
+        pass
+
+    def __init__(self, end):
+        self.now = 0
+        self.end = end
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if self.now + seconds > self.end:
+            raise self.Stop()
+        self.now += seconds
+
+
+class FetchDaemonTests(SimpleTestCase):
+    INTERVALS = {"contests": 100, "salaries": 200, "results": 300}
+
+    def setUp(self):
+        self.clock = FakeClock(end=1000)
+        # (time, kind, sport) of every poll
+        self.polls = []
+        self.incomplete = ["1", "2"]
+        self.completed = {"1"}
+        for target, name, new in [
+            (daemon, "time", self.clock),
+            (daemon, "close_old_connections", mock.Mock()),
+            (daemon.LobbySnapshot, "fetch", mock.Mock(side_effect=self.get_lobby)),
+            (
+                daemon,
+                "get_incomplete_contest_ids",
+                mock.Mock(side_effect=lambda sport: self.incomplete),
+            ),
+            (
+                daemon.dkcontests_parser,
+                "find_new_contests",
+                mock.Mock(side_effect=self.poll("contests")),
+            ),
+            (
+                daemon.dksalaries_parser,
+                "run",
+                mock.Mock(side_effect=self.poll("salaries")),
+            ),
+            (
+                daemon.dkresults_parser,
+                "run",
+                mock.Mock(side_effect=self.poll("results")),
+            ),
+        ]:
+            patcher = mock.patch.object(target, name, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.daemon = daemon.FetchDaemon(["NBA"], intervals=self.INTERVALS)
+
+    def get_lobby(self, sport, ttl):
+        return SimpleNamespace(fetched_at=self.clock.now)
+
+    def poll(self, kind):
+        def poll(sport, **kwargs):
+            self.polls.append((self.clock.now, kind, sport))
+            if kind == "results":
+                self.polls[-1] += (kwargs["contest_ids"],)
+                return self.completed
+
+        return poll
+
+    def run_daemon(self):
+        with self.assertRaises(FakeClock.Stop):
+            self.daemon.run()
+
+    def test_get_backoff(self):
+        self.assertEqual(daemon.get_backoff(1), daemon.MIN_BACKOFF)
+        self.assertEqual(daemon.get_backoff(2), daemon.MIN_BACKOFF * 2)
+        self.assertEqual(daemon.get_backoff(20), daemon.MAX_BACKOFF)
+
+    def test_polls_on_intervals(self):
+        self.run_daemon()
+        self.assertEqual(
+            [(when, kind) for when, kind, *_ in self.polls if when < 300],
+            [
+                (0, "contests"),
+                (0, "salaries"),
+                (0, "results"),
+                (100, "contests"),
+                (200, "contests"),
+                (200, "salaries"),
+            ],
+        )
+        counts = Counter(kind for _, kind, *_ in self.polls)
+        self.assertEqual(counts, {"contests": 11, "salaries": 6, "results": 4})
+
+    def test_in_progress_contests_back_off(self):
+        self.clock.end = daemon.MIN_BACKOFF + 300
+        self.run_daemon()
+        results = [(when, ids) for when, kind, _, *ids in self.polls if ids]
+        # contest 2 is still in progress, so it waits MIN_BACKOFF
+        self.assertEqual(results[0], (0, [["1", "2"]]))
+        self.assertEqual(results[1], (300, [["1"]]))
+        self.assertIn((daemon.MIN_BACKOFF, [["1", "2"]]), results)
+        self.assertEqual(self.daemon.backoff["2"], (2, daemon.MIN_BACKOFF * 3))
+
+    def test_failing_poll_is_retried(self):
+        daemon.dkcontests_parser.find_new_contests.side_effect = Exception("down")
+        with self.assertLogs(daemon.logger, "ERROR") as logs:
+            self.run_daemon()
+        self.assertIn("Polling contests for NBA failed", logs.output[0])
+        # the failing poll kept its schedule and didn't stop the others
+        self.assertEqual(len(logs.output), 11)
+        self.assertEqual(
+            Counter(kind for _, kind, *_ in self.polls),
+            {"salaries": 6, "results": 4},
+        )
+
+    def test_latency_stats_are_per_poll(self):
+        with mock.patch.object(client, "STATS", client.LatencyStats()):
+            client.STATS.record("https://www.draftkings.com/lobby/1", 0.5)
+            with self.assertLogs(client.logger, "INFO") as logs:
+                self.daemon.poll("salaries", "NBA")
+            self.assertEqual(client.STATS.summary(), {})
+        self.assertIn("/lobby/{id}: 1 requests", logs.output[0])
+
+
+class LobbySnapshotTests(SimpleTestCase):
+    """Saved lobbies are reused per sport until they're LOBBY_TTL seconds old."""
+
+    def setUp(self):
+        self.clock = FakeClock(float("inf"))
+        self.clock.now = 1_000_000
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.get = mock.Mock(side_effect=self.get_lobby)
+        for target, attribute, new in (
+            (lobby, "LOBBYPATH", Path(directory.name)),
+            (lobby, "time", self.clock),
+            (client, "get", self.get),
+        ):
+            patcher = mock.patch.object(target, attribute, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_lobby(self, url):
+        sport = url.rsplit("=", 1)[1]
+        contest = dict(DecodeLobbyTests.CONTEST, n=f"{sport} {self.get.call_count}")
+        return mock.Mock(content=json.dumps({"Contests": [contest]}).encode())
+
+    def fetch(self, sport, **kwargs):
+        snapshot = lobby.LobbySnapshot.fetch(sport, **kwargs)
+        # the saved file is as old as the fake clock says
+        filename = lobby.get_lobby_filename(sport)
+        if filename.stat().st_mtime > self.clock.now:
+            os.utime(filename, (self.clock.now, self.clock.now))
+        return snapshot
+
+    def test_fresh_lobby_is_reused(self):
+        first = self.fetch("NBA", ttl=300)
+        self.clock.now += 300
+        second = self.fetch("NBA", ttl=300)
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(second.contests, first.contests)
+        self.assertEqual(second.fetched_at, 1_000_000)
+
+    def test_expired_lobby_is_downloaded(self):
+        self.fetch("NBA", ttl=300)
+        self.clock.now += 301
+        snapshot = self.fetch("NBA", ttl=300)
+        self.assertEqual(self.get.call_count, 2)
+        self.assertEqual(snapshot.contests[0]["n"], "NBA 2")
+        # and saved again, so it's fresh for another ttl
+        self.clock.now += 300
+        self.assertEqual(self.fetch("NBA", ttl=300).contests[0]["n"], "NBA 2")
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_zero_ttl_always_downloads(self):
+        self.fetch("NBA", ttl=0)
+        self.fetch("NBA", ttl=0)
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_sports_are_saved_separately(self):
+        nba = self.fetch("NBA", ttl=300)
+        nfl = self.fetch("NFL", ttl=300)
+        self.assertEqual(self.get.call_count, 2)
+        self.assertEqual(nba.contests[0]["n"], "NBA 1")
+        self.assertEqual(nfl.contests[0]["n"], "NFL 2")
+        self.assertEqual(
+            sorted(path.name for path in lobby.LOBBYPATH.iterdir()),
+            ["lobby-NBA.json", "lobby-NFL.json"],
+        )
+        self.assertEqual(self.fetch("NBA", ttl=300).contests[0]["n"], "NBA 1")
+        self.assertEqual(self.get.call_count, 2)
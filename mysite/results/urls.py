@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 urlpatterns = [
     # ex: /results/
@@ -9,6 +9,20 @@ urlpatterns = [
     # path("dkcontests", views.index, name="index"),
     # ex: /polls/5/
     path("<int:contest_id>/", views.detail, name="detail"),
+    # ex: /results/cache-stats/
+    path("cache-stats/", views.cache_stats, name="cache-stats"),
+    # ex: /results/api/contests/?sport=NBA&limit=50
+    path("api/contests/", api.contests, name="api-contests"),
+    # ex: /results/api/5/results/?after=<cursor>&fields=name,rank
+    path("api/<int:contest_id>/results/", api.contest_results, name="api-results"),
+    # ex: /results/api/5/ownership/?format=ndjson
+    path(
+        "api/<int:contest_id>/ownership/",
+        api.contest_ownership,
+        name="api-ownership",
+    ),
+    # ex: /results/api/5/roi/?limit=20
+    path("api/<int:contest_id>/roi/", api.contest_roi, name="api-roi"),
     # # ex: /polls/5/results/
     # path("<int:question_id>/results/", views.results, name="results"),
     # # ex: /polls/5/vote/
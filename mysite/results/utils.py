@@ -1,10 +1,33 @@
 import datetime
 import logging
+from collections import namedtuple
 
-from results.models import DKContest
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from results.models import DKContest, DKContestPayout, DKResult, DKResultOwnership
 
 logger = logging.getLogger(__name__)
 
+# Roster slots per classic lineup
+ROSTER_SIZES = {"NBA": 8, "NFL": 9, "MLB": 10, "NHL": 9, "PGA": 6, "MMA": 6, "NAS": 5}
+# weight of each kind of missing data when ordering the backlog
+MISSING_PRIORITY = {"standings": 8, "ownership": 4, "payouts": 2, "contest": 1}
+
+ContestBacklog = namedtuple(
+    "ContestBacklog",
+    [
+        "dk_id",
+        "name",
+        "date",
+        "results",
+        "ownership",
+        "payouts",
+        "missing",
+        "priority",
+    ],
+)
+
 
 def get_datetime_yearless(datestr):
     """
@@ -24,28 +47,97 @@ def get_datetime_yearless(datestr):
     )
 
 
-def get_empty_contest_ids(sport):
+def count_related(model, field="pk"):
+    """Subquery counting the rows of @model that belong to the outer contest."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(contest=OuterRef("pk"))
+            .order_by()
+            .values("contest")
+            .annotate(total=Count(field))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def get_missing_data(contest):
+    """Return the names of the data sets an annotated contest is missing."""
+    missing = []
+    if contest.num_results == 0 and contest.num_ownership == 0:
+        missing.append("standings")
+    elif contest.num_ownership == 0:
+        missing.append("ownership")
+    if contest.num_payouts == 0:
+        missing.append("payouts")
+    if contest.positions_paid is None:
+        missing.append("contest")
+    return missing
+
+
+def get_contest_report(sport, days=7):
     """
-    Returns a list of contest ids for contests that are missing results data
+    Return a ContestBacklog for every contest of the last @days days, using a
+    single query.
     """
-    contest_ids = []
-    today = datetime.date.today()
-    last = today - datetime.timedelta(days=7)
-    contests = DKContest.objects.filter(date__gte=last, sport__exact=sport)
+    last = datetime.date.today() - datetime.timedelta(days=days)
+    contests = DKContest.objects.filter(date__gte=last, sport__exact=sport).annotate(
+        num_results=count_related(DKResult),
+        num_ownership=count_related(DKResultOwnership),
+        num_payouts=count_related(DKContestPayout),
+    )
+
+    report = []
     for contest in contests:
-        num_results = contest.results.count()
+        missing = get_missing_data(contest)
         logger.info(
             "%s entries expected for [%s] %s [%s], %s found",
             contest.entries,
             contest.dk_id,
             contest.name,
             contest.date,
-            num_results,
+            contest.num_results,
         )
-        if num_results == 0:
-            contest_ids.append(contest.dk_id)
-    logger.info("Contest ids: %s", ", ".join(contest_ids))
-    return contest_ids
+        report.append(
+            ContestBacklog(
+                dk_id=contest.dk_id,
+                name=contest.name,
+                date=contest.date,
+                results=contest.num_results,
+                ownership=contest.num_ownership,
+                payouts=contest.num_payouts,
+                missing=missing,
+                priority=sum(MISSING_PRIORITY[m] for m in missing),
+            )
+        )
+    return report
+
+
+def get_contest_backlog(sport, days=7):
+    """
+    Return the contests of the last @days days that are missing data, most
+    incomplete (then oldest) first.
+    """
+    backlog = [c for c in get_contest_report(sport, days) if c.missing]
+    backlog.sort(key=lambda c: (-c.priority, c.date))
+    return backlog
+
+
+def get_incomplete_contest_ids(sport):
+    """
+    Returns a list of contest ids for contests that are missing any data,
+    most incomplete first
+    """
+    backlog = get_contest_backlog(sport)
+    for contest in backlog:
+        logger.info(
+            "[%s] %s is missing %s",
+            contest.dk_id,
+            contest.name,
+            ", ".join(contest.missing),
+        )
+    return [contest.dk_id for contest in backlog]
 
 
 def get_contest_ids(sport, limit=1, entry_fee=None):
@@ -53,17 +145,12 @@ def get_contest_ids(sport, limit=1, entry_fee=None):
     Returns a list of contest ids for the last @limit days with an optional
     additional @entry_fee filter
     """
-    contest_ids = []
     today = datetime.date.today()
     last = today - datetime.timedelta(days=limit)
-    contests = (
-        DKContest.objects.filter(
-            sport__exact=sport, date__gte=last, entry_fee=entry_fee
-        )
-        if entry_fee
-        else DKContest.objects.filter(sport__exact=sport, date__gte=last)
-    )
-    contest_ids = [contest.dk_id for contest in contests]
+    contests = DKContest.objects.filter(sport__exact=sport, date__gte=last)
+    if entry_fee:
+        contests = contests.filter(entry_fee=entry_fee)
+    contest_ids = list(contests.values_list("dk_id", flat=True))
     logger.info("Contest ids: %s", ", ".join(contest_ids))
     return contest_ids
 
@@ -1,37 +1,74 @@
+import json
 import logging
 
-from django.http import Http404
-from django.shortcuts import render
+from django.db.models import IntegerField
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
 
-from .models import DKContest, DKSalary
+from .cache import cached_page, get_stats, get_version
+from .models import DKContest, DKResult
+from .summary import get_contest_summary
+from .utils import count_related
 
 logger = logging.getLogger(__name__)
 
+
+def get_index_key(request):
+    return f"results:index:{get_version('index')}"
+
+
+def get_detail_key(request, contest_id):
+    draft_group_ids = DKContest.objects.filter(pk=contest_id).values_list(
+        "draft_group_id", flat=True
+    )
+    if not draft_group_ids:
+        return None
+
+    return "results:detail:{}:{}:{}".format(
+        contest_id,
+        get_version(f"contest:{contest_id}"),
+        get_version(f"draft_group:{draft_group_ids[0]}"),
+    )
+
+
 # Create your views here.
+@cached_page(get_index_key)
 def index(request):
-    contests = DKContest.objects.order_by("-date")
+    contests = (
+        DKContest.objects.select_related("summary")
+        .annotate(
+            # counted only for contests that aren't summarized yet
+            num_results=Coalesce(
+                "summary__num_results",
+                count_related(DKResult),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by("-date")
+    )
     context = {"contests": contests}
     return render(request, "results/index.html", context)
 
 
+@cached_page(get_detail_key)
 def detail(request, contest_id):
-    try:
-        contest = DKContest.objects.get(pk=contest_id)
-        results = contest.results.order_by("rank")
-        ownership = contest.ownership.order_by("-ownership")
-        logger.debug("contest.draft_groupid = %s", contest.draft_group_id)
-        salary = DKSalary.objects.filter(draft_group_id__exact=contest.draft_group_id)
-        salary_dict = {s.player.name: s.salary for s in salary}
-
-        for row in ownership:
-            if row.player.name in salary_dict:
-                row.player.salary = salary_dict[row.player.name]
-            else:
-                row.player.salary = 0
-    except contest.DoesNotExist:
-        raise Http404("DKContest does not exist")
+    contest = get_object_or_404(
+        DKContest.objects.select_related("summary"), pk=contest_id
+    )
+    summary = get_contest_summary(contest)
     return render(
         request,
         "results/detail.html",
-        {"contest": contest, "results": results, "ownership": ownership},
+        {
+            "contest": contest,
+            "summary": summary,
+            "chalk": json.loads(summary.chalk),
+            "results": json.loads(summary.results),
+            "ownership": json.loads(summary.ownership),
+        },
     )
+
+
+def cache_stats(request):
+    return JsonResponse(get_stats())